@@ -47,11 +47,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     except JWTError:
         raise credentials_exception
     
-    # Fetch user from DB
-    result = await db.execute(
-        models.User.__table__.select().where(models.User.username == token_data.username)
-    )
-    user = result.fetchone()
+    # Fetch user (cached for a short time, see crud.get_user)
+    from . import crud
+    user = await crud.get_user(db, username=token_data.username)
     
     if user is None:
         raise credentials_exception
@@ -1,21 +1,191 @@
 import asyncio
-import json
 import logging
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+import operator
+import re
+import time
+import weakref
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Optional, Dict, Any, List, Callable, Literal, Tuple
+from datetime import datetime, timedelta
 from sqlalchemy.future import select
-from . import models, database, crud
+from . import models, database, crud, json_codec
 from .websocket_manager import manager
 
 logger = logging.getLogger(__name__)
 
+# Automation log rows are queued and written in batches by a background task
+LOG_QUEUE_MAXSIZE = 10_000
+LOG_BATCH_SIZE = 100
+LOG_STOP_TIMEOUT = 5.0  # seconds to wait for the writer on shutdown
+
+def _compile_topic_pattern(pattern: str) -> "re.Pattern[str]":
+    """Compile an MQTT topic pattern (supports + and # wildcards) to an anchored regex"""
+    parts = []
+    for level in pattern.split("/"):
+        if level == "#":
+            parts.append(".*")  # # matches everything after
+            break
+        elif level == "+":
+            parts.append("[^/]*")  # + matches single level
+        else:
+            parts.append(re.escape(level))
+    return re.compile("/".join(parts))
+
+def _json_needles(json_path: Optional[str], json_value: Any) -> tuple:
+    """Substrings that must appear in a raw payload for a JSON path/value condition to match"""
+    if not json_path or not json_value:
+        return ()
+    needles = [json_path]
+    # Numbers and booleans can be spelled differently in JSON (1e2, true), so only
+    # plain string values are safe to look for verbatim
+    value = str(json_value)
+    if value not in ("True", "False", "None") and '"' not in value:
+        try:
+            float(value)
+        except ValueError:
+            needles.append(value)
+    return tuple(needles)
+
+_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# Only equality operators fall back to string comparison
+_STRING_OPS = frozenset(("==", "!="))
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+def _never(actual) -> bool:
+    return False
+
+def _make_matcher(op_name: str, expected) -> Callable[[Any], bool]:
+    """Build a comparator for one (operator, expected value) pair: numeric comparison when both
+    sides are numbers, string comparison otherwise. Done once per trigger, so per-event matching
+    skips the operator lookup and the branching on the expected value"""
+    op = _OPS.get(op_name)
+    if op is None:
+        return _never
+    expected_num = _to_float(expected)
+    expected_str = str(expected)
+    string_op = op_name in _STRING_OPS
+    
+    if expected_num is None:
+        if not string_op:
+            return _never
+        return lambda actual: op(str(actual), expected_str)
+    
+    def match(actual) -> bool:
+        try:
+            return op(float(actual), expected_num)
+        except (ValueError, TypeError):
+            return string_op and op(str(actual), expected_str)
+    return match
+
+@dataclass(slots=True, frozen=True)
+class MqttTriggerSpec:
+    """Pre-parsed trigger_value of an "mqtt" automation"""
+    automation: models.Automation
+    topic: str
+    topic_re: "re.Pattern[str]"
+    payload_contains: Optional[str] = None
+    payload_json_path: Optional[str] = None
+    payload_json_value: Any = None
+    json_needles: tuple = ()
+
+    @classmethod
+    def from_automation(cls, automation: models.Automation) -> "MqttTriggerSpec":
+        # trigger_value format: {"topic": "tele/pump/STATE", "payload_contains": "ON"}
+        trigger_config = automation.trigger_value
+        topic = trigger_config.get("topic", "")
+        payload_json_path = trigger_config.get("payload_json_path")
+        payload_json_value = trigger_config.get("payload_json_value")
+        return cls(
+            automation=automation,
+            topic=topic,
+            topic_re=_compile_topic_pattern(topic),
+            payload_contains=trigger_config.get("payload_contains"),
+            payload_json_path=payload_json_path,
+            payload_json_value=payload_json_value,
+            json_needles=_json_needles(payload_json_path, payload_json_value),
+        )
+
+@dataclass(slots=True, frozen=True)
+class DeviceTriggerSpec:
+    """Pre-parsed trigger_value of a "device_state" automation"""
+    automation: models.Automation
+    device_id: int
+    attribute: Optional[str]
+    expected: Any
+    operator: str = "=="
+    for_duration: float = 0  # Duration in minutes
+    match: Callable[[Any], bool] = field(default=_never, compare=False, repr=False)  # Built by _make_matcher
+
+    @classmethod
+    def from_automation(cls, automation: models.Automation) -> "DeviceTriggerSpec":
+        # trigger_value format: {"device_id": 1, "attribute": "POWER", "value": "ON", "operator": "==", "for_duration": 5}
+        trigger_config = automation.trigger_value
+        expected = trigger_config.get("value")
+        op_name = trigger_config.get("operator", "==")
+        return cls(
+            automation=automation,
+            device_id=trigger_config.get("device_id"),
+            attribute=trigger_config.get("attribute"),
+            expected=expected,
+            operator=op_name,
+            for_duration=trigger_config.get("for_duration", 0) or 0,
+            match=_make_matcher(op_name, expected),
+        )
+
+@dataclass(slots=True, frozen=True)
+class TimeTriggerSpec:
+    """Pre-parsed trigger_value of a "time" automation"""
+    automation: models.Automation
+    hour: int
+    minute: int
+
+    @classmethod
+    def from_automation(cls, automation: models.Automation) -> "TimeTriggerSpec":
+        # Simple time trigger: {"hour": 6, "minute": 0}
+        trigger_config = automation.trigger_value
+        return cls(
+            automation=automation,
+            hour=int(trigger_config.get("hour")),
+            minute=int(trigger_config.get("minute")),
+        )
+
 class AutomationEngine:
     def __init__(self):
+        # Trigger indices, rebuilt whenever self.automations is assigned
+        self._mqtt_exact: Dict[str, List[MqttTriggerSpec]] = {}  # Map topic -> specs without wildcards
+        self._mqtt_wild: List[MqttTriggerSpec] = []
+        self._by_time: List[TimeTriggerSpec] = []
+        # device_state triggers: immediate ones only run when their attribute changes, duration
+        # ones on every state update of their device (to start or cancel the delay)
+        self._by_attribute: Dict[Tuple[int, str], List[DeviceTriggerSpec]] = {}  # Map (device_id, attribute) -> immediate specs
+        self._watched_attributes: Dict[int, frozenset] = {}  # Map device_id -> attributes with immediate specs
+        self._duration_by_device: Dict[int, List[DeviceTriggerSpec]] = {}  # Map device_id -> for_duration specs
+        self._specs: Dict[int, Any] = {}  # Map automation_id -> its indexed trigger spec
         self.automations: List[models.Automation] = []
         self.mqtt_service = None
         self._running = False
         self._tasks = set()
-        self._active_delays: Dict[int, asyncio.Task] = {}  # Map automation_id -> Task
+        # Map automation_id -> pending delay. Weak so a finished task can never linger here;
+        # the task itself is kept alive by self._tasks until it is done
+        self._active_delays: "weakref.WeakValueDictionary[int, asyncio.Task]" = weakref.WeakValueDictionary()
+        self._log_queue: asyncio.Queue = asyncio.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+        self._log_writer: Optional[asyncio.Task] = None
+        self._device_cache: Dict[int, Tuple[float, Tuple[str, str]]] = {}  # Map device_id -> (loaded_at, (mqtt_topic, name))
+        self._time_handles: Dict[int, asyncio.TimerHandle] = {}  # Map automation_id -> next time trigger
 
     async def start(self, mqtt_service):
         """Start the automation engine"""
@@ -25,13 +195,107 @@ class AutomationEngine:
         # Load automations from database
         await self.load_automations()
         
-        # Start monitoring tasks
-        task = asyncio.create_task(self._monitor_loop())
-        self._tasks.add(task)
-        task.add_done_callback(self._tasks.discard)
+        # Start log writer (time triggers are scheduled by load_automations)
+        if self._log_writer is None or self._log_writer.done():
+            self._log_writer = asyncio.create_task(self._log_flusher())
         
         logger.info("Automation Engine started")
 
+    @property
+    def automations(self) -> List[models.Automation]:
+        return self._automations
+
+    @automations.setter
+    def automations(self, automations: List[models.Automation]):
+        self._automations = automations
+        self._build_indices()
+
+    def _build_indices(self):
+        """Group enabled automations by trigger type so events don't scan the full list"""
+        self._mqtt_exact = {}
+        self._mqtt_wild = []
+        self._by_time = []
+        self._by_attribute = {}
+        self._watched_attributes = {}
+        self._duration_by_device = {}
+        self._specs = {}
+        for automation in self._automations:
+            self._index_automation(automation)
+
+    # Index buckets are replaced rather than mutated so a handler iterating one across an await is unaffected
+
+    def _index_automation(self, automation: models.Automation):
+        """Add an enabled automation's trigger spec to the indices"""
+        if not automation.enabled:
+            return
+
+        try:
+            if automation.trigger_type == "mqtt":
+                spec = MqttTriggerSpec.from_automation(automation)
+                if "+" in spec.topic or "#" in spec.topic:
+                    self._mqtt_wild = self._mqtt_wild + [spec]
+                else:
+                    self._mqtt_exact[spec.topic] = self._mqtt_exact.get(spec.topic, []) + [spec]
+            elif automation.trigger_type == "time":
+                spec = TimeTriggerSpec.from_automation(automation)
+                self._by_time = self._by_time + [spec]
+            elif automation.trigger_type == "device_state":
+                spec = DeviceTriggerSpec.from_automation(automation)
+                device_id = spec.device_id
+                if spec.for_duration > 0:
+                    self._duration_by_device[device_id] = self._duration_by_device.get(device_id, []) + [spec]
+                else:
+                    key = (device_id, spec.attribute)
+                    self._by_attribute[key] = self._by_attribute.get(key, []) + [spec]
+                    self._watched_attributes[device_id] = self._watched_attributes.get(device_id, frozenset()) | {spec.attribute}
+            else:
+                return
+        except Exception as e:
+            logger.error(f"Error parsing trigger for automation {automation.id}: {e}")
+            return
+        self._specs[automation.id] = spec
+
+    def _unindex_automation(self, automation_id: int):
+        """Remove an automation's trigger spec from the indices, touching only its bucket"""
+        spec = self._specs.pop(automation_id, None)
+        if spec is None:
+            return
+
+        if isinstance(spec, MqttTriggerSpec):
+            if "+" in spec.topic or "#" in spec.topic:
+                self._mqtt_wild = [s for s in self._mqtt_wild if s is not spec]
+            else:
+                remaining = [s for s in self._mqtt_exact.get(spec.topic, []) if s is not spec]
+                if remaining:
+                    self._mqtt_exact[spec.topic] = remaining
+                else:
+                    self._mqtt_exact.pop(spec.topic, None)
+        elif isinstance(spec, TimeTriggerSpec):
+            self._by_time = [s for s in self._by_time if s is not spec]
+            handle = self._time_handles.pop(automation_id, None)
+            if handle:
+                handle.cancel()
+        elif isinstance(spec, DeviceTriggerSpec):
+            device_id = spec.device_id
+            if spec.for_duration > 0:
+                remaining = [s for s in self._duration_by_device.get(device_id, []) if s is not spec]
+                if remaining:
+                    self._duration_by_device[device_id] = remaining
+                else:
+                    self._duration_by_device.pop(device_id, None)
+            else:
+                key = (device_id, spec.attribute)
+                remaining = [s for s in self._by_attribute.get(key, []) if s is not spec]
+                if remaining:
+                    self._by_attribute[key] = remaining
+                else:
+                    self._by_attribute.pop(key, None)
+                    attributes = self._watched_attributes.get(device_id, frozenset()) - {spec.attribute}
+                    if attributes:
+                        self._watched_attributes[device_id] = attributes
+                    else:
+                        self._watched_attributes.pop(device_id, None)
+
     async def load_automations(self):
         """Load all enabled automations from database"""
         async with database.AsyncSessionLocal() as db:
@@ -40,183 +304,226 @@ class AutomationEngine:
             )
             self.automations = result.scalars().all()
             logger.info(f"Loaded {len(self.automations)} enabled automations")
+        
+        self._schedule_time_triggers()
 
     async def reload_automations(self):
         """Reload automations (call this when automations are updated)"""
         # Cancel all pending delays on reload to avoid stale state
-        for task in self._active_delays.values():
+        for task in list(self._active_delays.values()):
             task.cancel()
         self._active_delays.clear()
+        self._device_cache.clear()
         
         await self.load_automations()
 
-    async def _monitor_loop(self):
-        """Background loop for time-based triggers"""
-        while self._running:
-            try:
-                # Check time-based triggers every minute
-                await self._check_time_triggers()
-                await asyncio.sleep(60)  # Check every minute
-            except Exception as e:
-                logger.error(f"Error in automation monitor loop: {e}")
-                await asyncio.sleep(60)
+    def apply_delta(self, automation_id: int, op: Literal["upsert", "delete", "toggle"], automation: Optional[models.Automation] = None):
+        """Apply a single automation change without reloading everything from the database.
+        `automation` is the row as saved (required for upsert/toggle)"""
+        self._unindex_automation(automation_id)
+        delay = self._active_delays.pop(automation_id, None)
+        if delay:
+            delay.cancel()
+        
+        self._automations = [a for a in self._automations if a.id != automation_id]
+        if op == "delete" or automation is None or not automation.enabled:
+            return
+        
+        self._automations.append(automation)
+        self._index_automation(automation)
+        spec = self._specs.get(automation_id)
+        if isinstance(spec, TimeTriggerSpec):
+            self._schedule_time_trigger(spec, datetime.now())
+
+    def invalidate_device(self, device_id: int):
+        """Drop a cached device lookup (call this when a device is updated)"""
+        self._device_cache.pop(device_id, None)
+
+    async def _get_device_cached(self, device_id: int, ttl: float = 30.0) -> Optional[Tuple[str, str]]:
+        """Return (mqtt_topic, name) for a device, hitting the database at most once per ttl"""
+        cached = self._device_cache.get(device_id)
+        now = time.monotonic()
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+        
+        async with database.AsyncSessionLocal() as db:
+            device = await crud.get_device(db, device_id)
+        if not device:
+            self._device_cache.pop(device_id, None)
+            return None
+        
+        info = (device.mqtt_topic, device.name)
+        self._device_cache[device_id] = (now, info)
+        return info
+
+    def _schedule_time_triggers(self):
+        """(Re)schedule a one-shot loop timer for every time-based automation"""
+        for handle in self._time_handles.values():
+            handle.cancel()
+        self._time_handles.clear()
+        
+        for spec in self._by_time:
+            self._schedule_time_trigger(spec, datetime.now())
 
-    async def _check_time_triggers(self):
-        """Check and execute time-based automations"""
+    def _schedule_time_trigger(self, spec: TimeTriggerSpec, after: datetime):
+        """Schedule the next firing of a time trigger strictly after `after`"""
+        next_fire = after.replace(hour=spec.hour, minute=spec.minute, second=0, microsecond=0)
+        if next_fire <= after:
+            next_fire += timedelta(days=1)
+        
+        delay = (next_fire - datetime.now()).total_seconds()
+        loop = asyncio.get_running_loop()
+        self._time_handles[spec.automation.id] = loop.call_at(
+            loop.time() + max(delay, 0), self._fire_time_trigger, spec
+        )
+
+    def _fire_time_trigger(self, spec: TimeTriggerSpec):
+        """Loop callback: execute a time-based automation and schedule its next run"""
+        self._time_handles.pop(spec.automation.id, None)
+        if not self._running:
+            return
+        
         now = datetime.now()
+        task = asyncio.create_task(
+            self.execute_automation(spec.automation, {"trigger": "time", "time": now.isoformat()})
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
         
-        for automation in self.automations:
-            # Skip disabled automations
-            if not automation.enabled:
-                continue
-                
-            if automation.trigger_type == "time":
-                try:
-                    trigger_config = automation.trigger_value
-                    # Simple time trigger: {"hour": 6, "minute": 0}
-                    if trigger_config.get("hour") == now.hour and trigger_config.get("minute") == now.minute:
-                        await self.execute_automation(automation, {"trigger": "time", "time": now.isoformat()})
-                except Exception as e:
-                    logger.error(f"Error checking time trigger for automation {automation.id}: {e}")
+        # Next occurrence is tomorrow; skip past the current minute so an early wakeup can't refire
+        self._schedule_time_trigger(spec, now.replace(second=59, microsecond=999999))
 
     async def handle_mqtt_message(self, topic: str, payload: str):
         """Check if any automation should be triggered by this MQTT message"""
-        for automation in self.automations:
-            # Skip disabled automations
-            if not automation.enabled:
-                continue
-                
-            if automation.trigger_type == "mqtt":
-                try:
-                    trigger_config = automation.trigger_value
-                    # trigger_value format: {"topic": "tele/pump/STATE", "payload_contains": "ON"}
-                    
-                    trigger_topic = trigger_config.get("topic", "")
-                    payload_contains = trigger_config.get("payload_contains")
-                    payload_json_path = trigger_config.get("payload_json_path")
-                    payload_json_value = trigger_config.get("payload_json_value")
-                    
-                    # Check if topic matches (support wildcards)
-                    if self._topic_matches(topic, trigger_topic):
-                        # Check payload conditions
-                        should_trigger = False
-                        
-                        if payload_contains and payload_contains in payload:
-                            should_trigger = True
-                        elif payload_json_path and payload_json_value:
-                            # Check JSON path (e.g., "POWER" == "ON")
-                            try:
-                                payload_data = json.loads(payload)
-                                actual_value = payload_data.get(payload_json_path)
-                                if str(actual_value) == str(payload_json_value):
-                                    should_trigger = True
-                            except json.JSONDecodeError:
-                                pass
-                        elif not payload_contains and not payload_json_path:
-                            # No payload condition, just topic match
+        # Exact topics are a dict hit; only wildcard patterns need matching
+        for spec in self._mqtt_exact.get(topic, ()):
+            await self._check_mqtt_trigger(spec, topic, payload)
+        
+        for spec in self._mqtt_wild:
+            if spec.topic_re.fullmatch(topic) is not None:
+                await self._check_mqtt_trigger(spec, topic, payload)
+
+    async def _check_mqtt_trigger(self, spec: MqttTriggerSpec, topic: str, payload: str):
+        """Check payload conditions of a topic-matched MQTT trigger and execute it"""
+        automation = spec.automation
+        try:
+            payload_contains = spec.payload_contains
+            payload_json_path = spec.payload_json_path
+            payload_json_value = spec.payload_json_value
+            
+            # Check payload conditions
+            should_trigger = False
+            
+            if payload_contains and payload_contains in payload:
+                should_trigger = True
+            elif payload_json_path and payload_json_value:
+                # Check JSON path (e.g., "POWER" == "ON")
+                # Skip the parse when the raw payload can't contain the key/value
+                # (escaped payloads always go through the real parse)
+                if "\\" in payload or all(needle in payload for needle in spec.json_needles):
+                    try:
+                        payload_data = json_codec.loads(payload)
+                        actual_value = payload_data.get(payload_json_path)
+                        if str(actual_value) == str(payload_json_value):
                             should_trigger = True
-                        
-                        if should_trigger:
-                            await self.execute_automation(
-                                automation,
-                                {"trigger": "mqtt", "topic": topic, "payload": payload}
-                            )
-                except Exception as e:
-                    logger.error(f"Error checking MQTT trigger for automation {automation.id}: {e}")
+                    except json_codec.JSONDecodeError:
+                        pass
+            elif not payload_contains and not payload_json_path:
+                # No payload condition, just topic match
+                should_trigger = True
+            
+            if should_trigger:
+                await self.execute_automation(
+                    automation,
+                    {"trigger": "mqtt", "topic": topic, "payload": payload}
+                )
+        except Exception as e:
+            logger.error(f"Error checking MQTT trigger for automation {automation.id}: {e}")
 
     def _compare_values(self, actual, expected, operator='=='):
         """Compare values using the specified operator"""
-        result = False
-        try:
-            # Try numeric comparison first
-            actual_num = float(actual)
-            expected_num = float(expected)
-            
-            if operator == '==':
-                result = actual_num == expected_num
-            elif operator == '!=':
-                result = actual_num != expected_num
-            elif operator == '<':
-                result = actual_num < expected_num
-            elif operator == '<=':
-                result = actual_num <= expected_num
-            elif operator == '>':
-                result = actual_num > expected_num
-            elif operator == '>=':
-                result = actual_num >= expected_num
-        except (ValueError, TypeError):
-            # Fall back to string comparison
-            if operator == '==':
-                result = str(actual) == str(expected)
-            elif operator == '!=':
-                result = str(actual) != str(expected)
-        
-        logger.debug(f"Compare: {actual} {operator} {expected} -> {result}")
+        result = _make_matcher(operator, expected)(actual)
+        logger.debug("Compare: %s %s %s -> %s", actual, operator, expected, result)
         return result
 
     async def handle_device_state_change(self, device_id: int, old_state: Dict, new_state: Dict):
         """Handle device state changes and check for matching triggers"""
-        for automation in self.automations:
-            # Skip disabled automations
-            if not automation.enabled:
-                continue
+        # Immediate triggers are looked up only for watched attributes that actually changed
+        specs = [
+            spec
+            for attribute in self._watched_attributes.get(device_id, ())
+            if old_state.get(attribute) != new_state.get(attribute)
+            for spec in self._by_attribute[(device_id, attribute)]
+        ]
+        specs.extend(self._duration_by_device.get(device_id, ()))
+        if not specs:
+            return
+        
+        for spec in specs:
+            automation = spec.automation
+            try:
+                attribute = spec.attribute
+                expected_value = spec.expected
+                operator = spec.operator
+                for_duration = spec.for_duration
+                
+                old_value = old_state.get(attribute)
+                new_value = new_state.get(attribute)
+                
+                # Immediate triggers only fire on a change of their attribute
+                if for_duration <= 0 and old_value == new_value:
+                    continue
                 
-            if automation.trigger_type == "device_state":
-                try:
-                    trigger_config = automation.trigger_value
-                    # trigger_value format: {"device_id": 1, "attribute": "POWER", "value": "ON", "operator": "==", "for_duration": 5}
+                # Check if state matches using comparison operator
+                logger.debug("Checking automation %s: %s (old=%s, new=%s) %s %s", automation.id, attribute, old_value, new_value, operator, expected_value)
+                is_match = spec.match(new_value)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Automation %s match result: %s", automation.id, is_match)
+                
+                if is_match:
+                    # If we have a duration requirement
+                    if for_duration > 0:
+                        # Start a delayed trigger if not already running
+                        if automation.id not in self._active_delays:
+                            logger.info(f"Starting delayed trigger for automation {automation.id} ({for_duration} mins)")
+                            task = asyncio.create_task(self._delayed_execution(automation, for_duration * 60, {
+                                "trigger": "device_state_duration",
+                                "device_id": device_id,
+                                "attribute": attribute,
+                                "value": new_value,
+                                "duration": for_duration
+                            }))
+                            self._active_delays[automation.id] = task
+                            self._tasks.add(task)
+                            task.add_done_callback(self._tasks.discard)
+                            task.add_done_callback(partial(self._clear_delay, automation.id))
                     
-                    if trigger_config.get("device_id") == device_id:
-                        attribute = trigger_config.get("attribute")
-                        expected_value = trigger_config.get("value")
-                        operator = trigger_config.get("operator", "==")
-                        for_duration = trigger_config.get("for_duration", 0) # Duration in minutes
-                        
-                        old_value = old_state.get(attribute)
-                        new_value = new_state.get(attribute)
-                        
-                        # Check if state matches using comparison operator
-                        logger.info(f"Checking automation {automation.id}: {attribute} (old={old_value}, new={new_value}) {operator} {expected_value}")
-                        is_match = self._compare_values(new_value, expected_value, operator)
-                        logger.info(f"Automation {automation.id} match result: {is_match}")
-                        
-                        if is_match:
-                            # If we have a duration requirement
-                            if for_duration > 0:
-                                # Start a delayed trigger if not already running
-                                if automation.id not in self._active_delays:
-                                    logger.info(f"Starting delayed trigger for automation {automation.id} ({for_duration} mins)")
-                                    task = asyncio.create_task(self._delayed_execution(automation, for_duration * 60, {
-                                        "trigger": "device_state_duration",
-                                        "device_id": device_id,
-                                        "attribute": attribute,
-                                        "value": new_value,
-                                        "duration": for_duration
-                                    }))
-                                    self._active_delays[automation.id] = task
-                                    task.add_done_callback(lambda t: self._active_delays.pop(automation.id, None))
-                            
-                            # Immediate trigger if no duration and value changed
-                            elif old_value != new_value:
-                                await self.execute_automation(
-                                    automation,
-                                    {
-                                        "trigger": "device_state",
-                                        "device_id": device_id,
-                                        "attribute": attribute,
-                                        "old_value": old_value,
-                                        "new_value": new_value
-                                    }
-                                )
-                        else:
-                            # State does not match, cancel any pending delay
-                            if automation.id in self._active_delays:
-                                logger.info(f"Cancelling delayed trigger for automation {automation.id} (condition no longer met)")
-                                self._active_delays[automation.id].cancel()
-                                del self._active_delays[automation.id]
-
-                except Exception as e:
-                    logger.error(f"Error checking device state trigger for automation {automation.id}: {e}")
+                    # Immediate trigger if no duration and value changed
+                    elif old_value != new_value:
+                        await self.execute_automation(
+                            automation,
+                            {
+                                "trigger": "device_state",
+                                "device_id": device_id,
+                                "attribute": attribute,
+                                "old_value": old_value,
+                                "new_value": new_value
+                            }
+                        )
+                else:
+                    # State does not match, cancel any pending delay
+                    pending = self._active_delays.pop(automation.id, None)
+                    if pending is not None:
+                        logger.info(f"Cancelling delayed trigger for automation {automation.id} (condition no longer met)")
+                        pending.cancel()
+
+            except Exception as e:
+                logger.error(f"Error checking device state trigger for automation {automation.id}: {e}")
+
+    def _clear_delay(self, automation_id: int, task: asyncio.Task):
+        """Done callback: forget a finished delay unless it was already replaced"""
+        if self._active_delays.get(automation_id) is task:
+            del self._active_delays[automation_id]
 
     async def _delayed_execution(self, automation, delay_seconds, trigger_data):
         """Wait for delay and then execute automation"""
@@ -258,15 +565,15 @@ class AutomationEngine:
                 command = action_config.get("command")
                 payload = action_config.get("payload")
                 
-                async with database.AsyncSessionLocal() as db:
-                    device = await crud.get_device(db, device_id)
-                    if device and self.mqtt_service:
-                        topic = f"cmnd/{device.mqtt_topic}/{command}"
-                        await self.mqtt_service.publish(topic, payload)
-                        action_result = {"device": device.name, "command": command, "payload": payload}
-                        logger.info(f"Sent command to device {device.name}: {command} {payload}")
-                    else:
-                        raise ValueError(f"Device {device_id} not found or MQTT not available")
+                device = await self._get_device_cached(device_id)
+                if device and self.mqtt_service:
+                    mqtt_topic, device_name = device
+                    topic = f"cmnd/{mqtt_topic}/{command}"
+                    await self.mqtt_service.publish(topic, payload)
+                    action_result = {"device": device_name, "command": command, "payload": payload}
+                    logger.info(f"Sent command to device {device_name}: {command} {payload}")
+                else:
+                    raise ValueError(f"Device {device_id} not found or MQTT not available")
             
             elif action_type == "delay":
                 # action_value format: {"seconds": 5}
@@ -277,13 +584,16 @@ class AutomationEngine:
             else:
                 raise ValueError(f"Unknown action type: {action_type}")
             
+            pending = []
+            
             # Broadcast automation execution via WebSocket
-            await manager.broadcast({
-                "type": "automation_executed",
-                "automation_id": automation.id,
-                "automation_name": automation.name,
-                "success": True
-            })
+            if manager.has_clients():
+                pending.append(manager.broadcast({
+                    "type": "automation_executed",
+                    "automation_id": automation.id,
+                    "automation_name": automation.name,
+                    "success": True
+                }))
 
             # Send notification
             from .notification_service import notification_service
@@ -291,8 +601,13 @@ class AutomationEngine:
                 # Construct a friendly message
                 msg = f"Automation '{automation.name}' executed successfully."
                 if action_result:
-                    msg += f"\nAction: {json.dumps(action_result)}"
-                await notification_service.notify("automation", msg)
+                    msg += f"\nAction: {json_codec.dumps(action_result)}"
+                pending.append(notification_service.notify("automation", msg))
+            
+            # Don't let a slow notifier serialize behind the WebSocket send
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.error(f"Error announcing automation {automation.id}: {result}")
             
         except Exception as e:
             success = False
@@ -303,16 +618,39 @@ class AutomationEngine:
         await self._log_execution(automation.id, trigger_data, action_result, success, error_message)
 
     async def _log_execution(self, automation_id: int, trigger_data: Dict, action_result: Dict, success: bool, error_message: Optional[str]):
-        """Log automation execution to database"""
+        """Queue automation execution log for the background flusher"""
+        try:
+            self._log_queue.put_nowait({
+                "automation_id": automation_id,
+                "trigger_data": trigger_data,
+                "action_result": action_result,
+                "success": success,
+                "error_message": error_message
+            })
+        except asyncio.QueueFull:
+            logger.warning(f"Automation log queue full, dropping log for automation {automation_id}")
+
+    async def _log_flusher(self):
+        """Background loop that writes queued automation logs in batches"""
+        while self._running:
+            try:
+                entry = await asyncio.wait_for(self._log_queue.get(), timeout=1.0)
+            except asyncio.TimeoutError:
+                continue
+            
+            batch = [entry]
+            while len(batch) < LOG_BATCH_SIZE and not self._log_queue.empty():
+                batch.append(self._log_queue.get_nowait())
+            
+            try:
+                await self._write_logs(batch)
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} automation logs: {e}")
+
+    async def _write_logs(self, entries: List[Dict[str, Any]]):
+        """Insert a batch of automation logs in a single transaction"""
         async with database.AsyncSessionLocal() as db:
-            log_entry = models.AutomationLog(
-                automation_id=automation_id,
-                trigger_data=trigger_data,
-                action_result=action_result,
-                success=success,
-                error_message=error_message
-            )
-            db.add(log_entry)
+            db.add_all([models.AutomationLog(**entry) for entry in entries])
             await db.commit()
 
     def _topic_matches(self, actual_topic: str, pattern: str) -> bool:
@@ -336,6 +674,31 @@ class AutomationEngine:
     async def stop(self):
         """Stop the automation engine"""
         self._running = False
+        
+        for handle in self._time_handles.values():
+            handle.cancel()
+        self._time_handles.clear()
+        
+        # The flusher notices _running within a second; a batch it is writing is finished first
+        if self._log_writer is not None:
+            try:
+                await asyncio.wait_for(self._log_writer, timeout=LOG_STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("Automation log writer did not stop in time; cancelled it")
+            except Exception as e:
+                logger.error(f"Automation log writer failed: {e}")
+            self._log_writer = None
+        
+        # Write out anything still queued
+        batch = []
+        while not self._log_queue.empty():
+            batch.append(self._log_queue.get_nowait())
+        if batch:
+            try:
+                await self._write_logs(batch)
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} automation logs: {e}")
+        
         logger.info("Automation Engine stopped")
 
 # Global instance
@@ -1,10 +1,30 @@
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import String, cast, func, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from sqlalchemy.future import select
 from . import models, schemas, auth
 
+# mqtt_topic -> device id, so repeat lookups become primary-key gets that the
+# session identity map can answer without another query
+_topic_to_id: Dict[str, int] = {}
+
+# Rarely-changing rows read on every request/startup, cached for a short time
+CACHE_TTL = 60.0  # seconds
+_user_cache: Dict[str, Tuple[float, models.User]] = {}
+_mqtt_config_cache: Optional[Tuple[float, models.MQTTConfig]] = None
+
 async def get_user(db: AsyncSession, username: str):
+    cached = _user_cache.get(username)
+    if cached and time.monotonic() - cached[0] < CACHE_TTL:
+        return cached[1]
+
     result = await db.execute(select(models.User).filter(models.User.username == username))
-    return result.scalars().first()
+    user = result.scalars().first()
+    if user:
+        _user_cache[username] = (time.monotonic(), user)
+    return user
 
 async def create_user(db: AsyncSession, user: schemas.UserCreate):
     hashed_password = auth.get_password_hash(user.password)
@@ -12,75 +32,147 @@ async def create_user(db: AsyncSession, user: schemas.UserCreate):
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
+    _user_cache.pop(db_user.username, None)
     return db_user
 
 async def update_user(db: AsyncSession, user_id: int, user_update: schemas.UserCreate):
     result = await db.execute(select(models.User).filter(models.User.id == user_id))
     db_user = result.scalars().first()
     if db_user:
+        _user_cache.pop(db_user.username, None)
         db_user.username = user_update.username
         if user_update.password:
             db_user.password_hash = auth.get_password_hash(user_update.password)
         await db.commit()
         await db.refresh(db_user)
+        _user_cache.pop(db_user.username, None)
     return db_user
 
 async def get_mqtt_config(db: AsyncSession):
+    global _mqtt_config_cache
+    if _mqtt_config_cache and time.monotonic() - _mqtt_config_cache[0] < CACHE_TTL:
+        return _mqtt_config_cache[1]
+
     result = await db.execute(select(models.MQTTConfig))
-    return result.scalars().first()
+    config = result.scalars().first()
+    _mqtt_config_cache = (time.monotonic(), config) if config else None
+    return config
 
 async def update_mqtt_config(db: AsyncSession, config: schemas.MQTTConfigCreate):
+    global _mqtt_config_cache
     result = await db.execute(select(models.MQTTConfig))
     db_config = result.scalars().first()
     
     if not db_config:
-        db_config = models.MQTTConfig(**config.dict())
+        db_config = models.MQTTConfig(**config.model_dump())
         db.add(db_config)
     else:
-        for key, value in config.dict().items():
+        for key, value in config.model_dump().items():
             setattr(db_config, key, value)
             
     await db.commit()
     await db.refresh(db_config)
+    _mqtt_config_cache = (time.monotonic(), db_config)
     return db_config
 
-async def get_devices(db: AsyncSession, skip: int = 0, limit: int = 100):
-    result = await db.execute(select(models.Device).order_by(models.Device.mqtt_topic).offset(skip).limit(limit))
+async def get_devices(db: AsyncSession, skip: int = 0, limit: int = 100, columns: Optional[Sequence] = None):
+    """List devices; pass `columns` (e.g. [models.Device.id, models.Device.mqtt_topic]) to load only those.
+    Unloaded columns must not be touched afterwards - they can't lazy-load in an async session."""
+    query = select(models.Device)
+    if columns:
+        query = query.options(load_only(*columns))
+    result = await db.execute(query.order_by(models.Device.mqtt_topic).offset(skip).limit(limit))
+    return result.scalars().all()
+
+async def get_devices_with_active_timers(db: AsyncSession):
+    """Devices that have at least one stored timer (id, mqtt_topic and active_timers loaded only).
+    active_timers is a JSON (not JSONB) column, so emptiness is checked on its text form"""
+    timers_text = func.coalesce(cast(models.Device.active_timers, String), "{}")
+    result = await db.execute(
+        select(models.Device)
+        .options(load_only(models.Device.id, models.Device.mqtt_topic, models.Device.active_timers))
+        .where(timers_text.notin_(("{}", "null")))
+    )
     return result.scalars().all()
 
 async def get_device_by_topic(db: AsyncSession, topic: str):
+    device_id = _topic_to_id.get(topic)
+    if device_id is not None:
+        device = await db.get(models.Device, device_id)
+        if device and device.mqtt_topic == topic:
+            return device
+        # Deleted or re-topiced since we cached it
+        _topic_to_id.pop(topic, None)
+
     result = await db.execute(select(models.Device).filter(models.Device.mqtt_topic == topic))
-    return result.scalars().first()
+    device = result.scalars().first()
+    if device:
+        _topic_to_id[topic] = device.id
+    return device
+
+def forget_device_topic(topic: str):
+    """Drop a cached topic -> id mapping (call this when a device is deleted)"""
+    _topic_to_id.pop(topic, None)
 
 async def get_device(db: AsyncSession, device_id: int):
     result = await db.execute(select(models.Device).filter(models.Device.id == device_id))
     return result.scalars().first()
 
+async def get_devices_by_ids(db: AsyncSession, device_ids: Iterable[int]) -> Dict[int, models.Device]:
+    """Fetch several devices with one IN query, keyed by id (missing ids are simply absent)"""
+    device_ids = set(device_ids)
+    if not device_ids:
+        return {}
+    result = await db.execute(select(models.Device).where(models.Device.id.in_(device_ids)))
+    return {device.id: device for device in result.scalars()}
+
+async def create_device(db: AsyncSession, device_data: dict):
+    """Insert a device known not to exist yet"""
+    db_device = models.Device(**device_data)
+    db.add(db_device)
+    # id comes back from the INSERT and column defaults are applied client-side,
+    # so no refresh round trip is needed
+    await db.commit()
+    _topic_to_id[db_device.mqtt_topic] = db_device.id
+    return db_device
+
 async def create_or_update_device(db: AsyncSession, device_data: dict):
     # Check if device exists
     topic = device_data.get("mqtt_topic")
-    result = await db.execute(select(models.Device).filter(models.Device.mqtt_topic == topic))
-    db_device = result.scalars().first()
+    db_device = await get_device_by_topic(db, topic)
 
-    if db_device:
-        # Update existing
-        for key, value in device_data.items():
-            setattr(db_device, key, value)
-    else:
-        # Create new
-        db_device = models.Device(**device_data)
-        db.add(db_device)
+    if not db_device:
+        return await create_device(db, device_data)
+
+    # Update existing
+    for key, value in device_data.items():
+        setattr(db_device, key, value)
     
     await db.commit()
-    await db.refresh(db_device)
+    _topic_to_id[db_device.mqtt_topic] = db_device.id
     return db_device
 
-async def create_sensor_data(db: AsyncSession, device_id: int, data: dict):
-    db_sensor = models.SensorData(device_id=device_id, data=data)
-    db.add(db_sensor)
+async def set_device_timers(db: AsyncSession, device: models.Device, active_timers: dict):
+    """Write only the active_timers column; the loaded device is synchronized in the session"""
+    await db.execute(
+        update(models.Device).where(models.Device.id == device.id).values(active_timers=active_timers)
+    )
+    await db.commit()
+    return device
+
+async def update_devices_batch(db: AsyncSession, rows: List[dict]):
+    """Apply many partial device updates ({"id", <column>: value, ...}) as one executemany + commit"""
+    if not rows:
+        return
+    await db.execute(update(models.Device), rows)
+    await db.commit()
+
+async def create_sensor_data_batch(db: AsyncSession, rows: List[dict]):
+    """Insert many sensor readings ({"device_id", "data", "timestamp"}) with one executemany + commit"""
+    if not rows:
+        return
+    await db.execute(insert(models.SensorData), rows)
     await db.commit()
-    await db.refresh(db_sensor)
-    return db_sensor
 
 async def get_sensor_history(db: AsyncSession, device_id: int, limit: int = 100, hours: int = None):
     query = select(models.SensorData).filter(models.SensorData.device_id == device_id)
@@ -95,3 +187,16 @@ async def get_sensor_history(db: AsyncSession, device_id: int, limit: int = 100,
     )
     return result.scalars().all()
 
+async def get_sensor_history_raw(db: AsyncSession, device_id: int, limit: int = 100, hours: int = None):
+    """Like get_sensor_history, but streams plain {"timestamp", "data"} dicts without building ORM objects"""
+    query = select(models.SensorData.timestamp, models.SensorData.data).filter(models.SensorData.device_id == device_id)
+    
+    if hours:
+        from datetime import datetime, timedelta
+        since = datetime.now() - timedelta(hours=hours)
+        query = query.filter(models.SensorData.timestamp >= since)
+    
+    result = await db.stream(
+        query.order_by(models.SensorData.timestamp.desc()).limit(limit).execution_options(yield_per=1000)
+    )
+    return [dict(row) async for row in result.mappings()]
@@ -0,0 +1,29 @@
+"""
+JSON encode/decode helpers - uses orjson when installed, stdlib json otherwise
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Both orjson.JSONDecodeError and json.JSONDecodeError subclass this
+JSONDecodeError = json.JSONDecodeError
+
+if orjson is not None:
+    def loads(data):
+        """Decode JSON from str or bytes"""
+        return orjson.loads(data)
+
+    def dumps(obj) -> str:
+        """Encode an object to a JSON string"""
+        return orjson.dumps(obj).decode()
+else:
+    def loads(data):
+        """Decode JSON from str or bytes"""
+        return json.loads(data)
+
+    def dumps(obj) -> str:
+        """Encode an object to a JSON string"""
+        return json.dumps(obj)
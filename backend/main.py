@@ -56,20 +56,55 @@ async def startup_event():
         # Initialize Notification Service
         from .notification_service import notification_service
         print("Initializing Notification Service...")
-        await notification_service.load_config()
+        await notification_service.start()
         print("Notification Service initialized.")
+
+        from .database import prewarm_pool
+        await prewarm_pool()
     except Exception as e:
         print(f"Error during startup: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Flush queued sensor history and automation logs before the services they depend on go away
+    await mqtt_service.stop()
+
+    from .automation_engine import automation_engine
+    await automation_engine.stop()
+
+    from .notification_service import notification_service
+    await notification_service.stop()
+
 @app.get("/api/health")
 async def health_check():
     return {"status": "ok"}
 
 # Mount static files (Frontend will be built to 'backend/static')
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
+from typing import Optional, Tuple
+import functools
+import mimetypes
 import os
+import stat
 
 static_dir = os.path.join(os.path.dirname(__file__), "static")
+# Small static files (favicon, etc) are kept in memory after the first request
+SMALL_STATIC_FILE_MAX_BYTES = 64 * 1024
+
+@functools.lru_cache(maxsize=64)
+def _stat_file(path: str) -> Tuple[bool, Optional[bytes]]:
+    """Return (is_regular_file, content) for a static path; content only for small files"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False, None
+    if not stat.S_ISREG(st.st_mode):
+        return False, None
+    if st.st_size > SMALL_STATIC_FILE_MAX_BYTES:
+        return True, None
+    with open(path, "rb") as f:
+        return True, f.read()
+
 if os.path.exists(static_dir):
     # Mount assets explicitly
     assets_dir = os.path.join(static_dir, "assets")
@@ -79,15 +114,25 @@ if os.path.exists(static_dir):
     # Mount other static files if needed (e.g. vite.svg)
     app.mount("/vite.svg", StaticFiles(directory=static_dir), name="vite")
 
+    # SPA entry point, read once
+    index_path = os.path.join(static_dir, "index.html")
+    with open(index_path, "rb") as f:
+        _INDEX_HTML = f.read()
+
     # Catch-all for SPA
     @app.get("/{full_path:path}")
     async def serve_frontend(full_path: str):
         # Check if file exists in static directory first (for favicon, etc)
-        file_path = os.path.join(static_dir, full_path)
-        if os.path.exists(file_path) and os.path.isfile(file_path):
-            return FileResponse(file_path)
+        file_path = os.path.normpath(os.path.join(static_dir, full_path))
+        if file_path.startswith(static_dir + os.sep):
+            is_file, content = _stat_file(file_path)
+            if content is not None:
+                media_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+                return Response(content=content, media_type=media_type)
+            if is_file:
+                return FileResponse(file_path)
             
         # Fallback to index.html for SPA routing
-        return FileResponse(os.path.join(static_dir, "index.html"))
+        return Response(content=_INDEX_HTML, media_type="text/html")
 else:
     print(f"Warning: Static directory '{static_dir}' does not exist. Frontend will not be served.")
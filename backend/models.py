@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, JSON, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, JSON, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from .database import Base
 
 class User(Base):
@@ -48,6 +48,10 @@ class SensorData(Base):
 
     device = relationship("Device", back_populates="sensor_data")
 
+    __table_args__ = (
+        Index("ix_sensor_device_ts", "device_id", "timestamp"),  # History queries by device, newest first
+    )
+
 class Automation(Base):
     __tablename__ = "automations"
 
@@ -59,17 +63,25 @@ class Automation(Base):
     action_type = Column(String, nullable=False) # e.g., "mqtt_publish", "delay"
     action_value = Column(JSON, nullable=False) # Configuration for the action
 
+    __table_args__ = (
+        Index("ix_automation_enabled_type", "enabled", "trigger_type"),
+    )
+
 class AutomationLog(Base):
     __tablename__ = "automation_logs"
 
     id = Column(Integer, primary_key=True, index=True)
-    automation_id = Column(Integer, ForeignKey("automations.id"))
+    automation_id = Column(Integer, ForeignKey("automations.id", ondelete="CASCADE"))
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     trigger_data = Column(JSON)  # What triggered it
     action_result = Column(JSON)  # Result of the action
     success = Column(Boolean, default=True)
     error_message = Column(String, nullable=True)
 
+    __table_args__ = (
+        Index("ix_automation_log_automation_ts", "automation_id", "timestamp"),
+    )
+
 class Schedule(Base):
     __tablename__ = "schedules"
 
@@ -101,6 +113,11 @@ class Schedule(Base):
     # Action: "ON", "OFF", "TOGGLE"
     action = Column(String, default="ON")
 
+    __table_args__ = (
+        # Partial index: the engine only ever loads enabled schedules
+        Index("ix_schedule_enabled", "enabled", postgresql_where=text("enabled")),
+    )
+
 class NotificationConfig(Base):
     __tablename__ = "notification_config"
 
@@ -1,27 +1,74 @@
 import asyncio
-import json
 import logging
-from typing import Optional, Callable, Dict, Any
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional, Callable, Dict, Any, List
 import aiomqtt
-from sqlalchemy.future import select
-from . import models, database, schemas, crud
+from . import models, database, schemas, crud, json_codec
 from .websocket_manager import manager
 
 logger = logging.getLogger(__name__)
 
+# Sensor history rows are queued and inserted in batches by a background task
+SENSOR_QUEUE_MAXSIZE = 10_000
+SENSOR_BATCH_SIZE = 500
+SENSOR_FLUSH_INTERVAL = 1.0  # seconds
+
+# Device updates from MQTT are coalesced per device and written in one batch
+DEVICE_FLUSH_INTERVAL = 0.1  # seconds
+
+# Received messages are handed to worker tasks, sharded by device so each device's frames stay in order
+RX_WORKERS = os.cpu_count() or 4
+RX_QUEUE_MAXSIZE = 10_000  # split across the worker queues
+RX_BACKLOG_WARN = 1_000  # per-worker queue depth that gets logged
+
+_TASMOTA_PREFIXES = frozenset(("tele", "stat", "cmnd"))
+# First characters a JSON document can start with (object, array, string, number, true/false/null)
+_JSON_START = frozenset('{["-0123456789tfn')
+
+def _parse_topic(topic: str):
+    """Split a topic into (device_topic, prefix, suffix); prefix is None for generic topics.
+    Supports both formats:
+    Old: tele/device/SENSOR
+    New: tasmota/device/tele/SENSOR"""
+    if topic.startswith("tasmota/"):
+        device_topic, _, rest = topic[8:].partition("/")
+        prefix, sep, suffix = rest.partition("/")
+        if sep:
+            return device_topic, prefix, suffix
+    prefix, sep, rest = topic.partition("/")
+    if sep and prefix in _TASMOTA_PREFIXES:
+        device_topic, sep, suffix = rest.partition("/")
+        if sep:
+            return device_topic, prefix, suffix
+    # Generic/Custom topic handling fallback
+    return topic, None, None
+
 class MQTTService:
     def __init__(self):
         self.client: Optional[aiomqtt.Client] = None
         self.config: Optional[models.MQTTConfig] = None
         self.is_connected = False
         self._tasks = set()
+        self._broadcasts = set()  # in-flight WebSocket broadcasts, kept referenced until done
+        self._sensor_queue: asyncio.Queue = asyncio.Queue(maxsize=SENSOR_QUEUE_MAXSIZE)
+        self._sensor_writer: Optional[asyncio.Task] = None
+        self._writes = set()  # in-flight batch writes, finished even when their writer loop is cancelled
+        # device id -> latest unwritten column values ({"id": ..., "attributes": ..., ...})
+        self._pending_devices: Dict[int, Dict[str, Any]] = {}
+        self._flushing_devices: Dict[int, Dict[str, Any]] = {}
+        self._devices_dirty = asyncio.Event()
+        self._device_writer: Optional[asyncio.Task] = None
+        self._rx_queues: List[asyncio.Queue] = []
+        self._rx_workers: List[asyncio.Task] = []
+        self._last_backlog_warning = 0.0
 
     async def load_config(self):
         print("Loading MQTT config...")
         try:
             async with database.AsyncSessionLocal() as db:
-                result = await db.execute(select(models.MQTTConfig))
-                self.config = result.scalars().first()
+                self.config = await crud.get_mqtt_config(db)
                 if self.config:
                     print(f"Loaded config: {self.config.broker_host}")
                 else:
@@ -31,6 +78,14 @@ class MQTTService:
 
     async def start(self):
         print("MQTT Service starting...")
+        # The history writer outlives broker reconnects/restarts
+        if self._sensor_writer is None or self._sensor_writer.done():
+            self._sensor_writer = asyncio.create_task(self._sensor_writer_loop())
+        if self._device_writer is None or self._device_writer.done():
+            self._device_writer = asyncio.create_task(self._device_writer_loop())
+        if not self._rx_workers:
+            self._rx_queues = [asyncio.Queue(maxsize=RX_QUEUE_MAXSIZE // RX_WORKERS) for _ in range(RX_WORKERS)]
+            self._rx_workers = [asyncio.create_task(self._rx_worker(queue)) for queue in self._rx_queues]
         await self.load_config()
         if not self.config:
             print("MQTT Service: No config, aborting start.")
@@ -52,6 +107,128 @@ class MQTTService:
         except Exception as e:
             logger.error(f"Failed to initialize MQTT client: {e}")
 
+    def enqueue_sensor_data(self, device_id: int, data: dict):
+        """Queue a sensor reading for the batched history writer"""
+        try:
+            self._sensor_queue.put_nowait({
+                "device_id": device_id,
+                "data": data,
+                "timestamp": datetime.now(timezone.utc)
+            })
+        except asyncio.QueueFull:
+            logger.warning(f"Sensor history queue full, dropping reading for device {device_id}")
+
+    async def _sensor_writer_loop(self):
+        """Background loop that inserts queued sensor readings in batches"""
+        while True:
+            rows: List[dict] = [await self._sensor_queue.get()]
+            
+            # Collect more rows until the batch is full or the flush interval passes
+            deadline = asyncio.get_running_loop().time() + SENSOR_FLUSH_INTERVAL
+            try:
+                while len(rows) < SENSOR_BATCH_SIZE:
+                    timeout = deadline - asyncio.get_running_loop().time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        rows.append(await asyncio.wait_for(self._sensor_queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Stopping mid-batch: the rows are already off the queue, so write them anyway
+                self._start_write(self._write_sensor_rows(rows))
+                raise
+            
+            await asyncio.shield(self._start_write(self._write_sensor_rows(rows)))
+
+    async def _write_sensor_rows(self, rows: List[dict]):
+        """Insert one batch of sensor history rows"""
+        try:
+            async with database.AsyncSessionLocal() as db:
+                await crud.create_sensor_data_batch(db, rows)
+        except Exception as e:
+            logger.error(f"Error writing {len(rows)} sensor history rows: {e}")
+
+    def _start_write(self, coro) -> asyncio.Task:
+        """Run a batch write as its own task so cancelling the writer loop (on stop) can't cut it short"""
+        task = asyncio.create_task(coro)
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+        return task
+
+    async def _flush_sensor_queue(self):
+        """Write out every queued sensor reading (used on stop)"""
+        while not self._sensor_queue.empty():
+            count = min(SENSOR_BATCH_SIZE, self._sensor_queue.qsize())
+            await self._write_sensor_rows([self._sensor_queue.get_nowait() for _ in range(count)])
+
+    def _broadcast_nowait(self, message: dict):
+        """Serialize once and broadcast in the background so slow WebSocket clients don't stall MQTT handling"""
+        task = asyncio.create_task(manager.broadcast(json_codec.dumps(message)))
+        self._broadcasts.add(task)
+        task.add_done_callback(self._broadcasts.discard)
+
+    async def _load_device(self, db, device_topic: str) -> Optional[models.Device]:
+        """Fetch a device detached from the session, with any unwritten updates applied"""
+        device = await crud.get_device_by_topic(db, device_topic)
+        if device:
+            db.expunge(device)
+            for batch in (self._flushing_devices, self._pending_devices):
+                for key, value in batch.get(device.id, {}).items():
+                    setattr(device, key, value)
+        return device
+
+    async def _stage_device_update(self, db, device: Optional[models.Device], device_topic: str, fields: Dict[str, Any]) -> models.Device:
+        """Apply fields to the device in memory and queue them for the batched writer.
+        Unknown devices are inserted right away so they get an id"""
+        if device is None:
+            device = await crud.create_device(db, {"mqtt_topic": device_topic, **fields})
+            db.expunge(device)
+            return device
+        for key, value in fields.items():
+            setattr(device, key, value)
+        self._pending_devices.setdefault(device.id, {"id": device.id}).update(fields)
+        self._devices_dirty.set()
+        return device
+
+    async def _device_writer_loop(self):
+        """Background loop that writes coalesced device updates in batches"""
+        while True:
+            await self._devices_dirty.wait()
+            # Let a burst of frames for the same devices collapse into one row each
+            await asyncio.sleep(DEVICE_FLUSH_INTERVAL)
+            self._devices_dirty.clear()
+            self._flushing_devices, self._pending_devices = self._pending_devices, {}
+            try:
+                async with database.AsyncSessionLocal() as db:
+                    await crud.update_devices_batch(db, list(self._flushing_devices.values()))
+            except Exception as e:
+                logger.error(f"Error writing {len(self._flushing_devices)} device updates: {e}")
+            finally:
+                self._flushing_devices = {}
+
+    async def _dispatch_message(self, message):
+        """Queue a received message for the worker that owns its device (waits when that worker is backed up)"""
+        device_topic = _parse_topic(message.topic.value)[0]
+        queue = self._rx_queues[hash(device_topic) % len(self._rx_queues)]
+        await queue.put(message)
+        
+        depth = queue.qsize()
+        if depth >= RX_BACKLOG_WARN:
+            now = time.monotonic()
+            if now - self._last_backlog_warning >= 10:
+                self._last_backlog_warning = now
+                logger.warning(f"MQTT receive backlog: {depth} messages queued for one worker")
+
+    async def _rx_worker(self, queue: asyncio.Queue):
+        """Handle queued messages one at a time"""
+        while True:
+            message = await queue.get()
+            try:
+                await self.handle_message(message)
+            except Exception as e:
+                logger.error(f"Error handling queued MQTT message: {e}")
+
     async def _connect_loop(self):
         print("Entering _connect_loop...")
         if not self.client:
@@ -85,12 +262,13 @@ class MQTTService:
                             if custom_topic and custom_topic.strip():
                                 topics.append(custom_topic.strip())
                     
-                    for topic in topics:
-                        await self.client.subscribe(topic)
-                        print(f"Subscribed to: {topic}")
+                    # One SUBSCRIBE packet for everything (custom topics may repeat built-ins)
+                    topics = list(dict.fromkeys(topics))
+                    await self.client.subscribe([(topic, 0) for topic in topics])
+                    print(f"Subscribed to: {', '.join(topics)}")
                     
                     async for message in self.client.messages:
-                        await self.handle_message(message)
+                        await self._dispatch_message(message)
             except aiomqtt.MqttError as e:
                 self.is_connected = False
                 logger.error(f"MQTT Connection lost: {e}. Reconnecting in 5s...")
@@ -109,142 +287,36 @@ class MQTTService:
         logger.info(f"MQTT RX: {topic} -> {payload}")
         
         # Broadcast raw message to frontend for real-time updates
-        await manager.broadcast({
-            "type": "mqtt_message",
-            "topic": topic,
-            "payload": payload
-        })
+        if manager.has_clients():
+            self._broadcast_nowait({
+                "type": "mqtt_message",
+                "topic": topic,
+                "payload": payload
+            })
         
         # Notify automation engine of MQTT message
         from .automation_engine import automation_engine
         await automation_engine.handle_mqtt_message(topic, payload)
         
         try:
-            # Parse Topic - support both formats:
-            # Old: tele/device/SENSOR
-            # New: tasmota/device/tele/SENSOR
-            parts = topic.split("/")
-            
-            is_tasmota = False
-            device_topic = None
-            prefix = None
-            suffix = None
-            
-            # Determine format and extract device_topic
-            if parts[0] == "tasmota" and len(parts) >= 4:
-                # New format: tasmota/device_id/tele/SENSOR
-                device_topic = parts[1]
-                prefix = parts[2]  # tele, stat
-                suffix = "/".join(parts[3:])  # SENSOR, STATE, RESULT
-                is_tasmota = True
-            elif len(parts) >= 3 and parts[0] in ["tele", "stat", "cmnd"]:
-                # Old format: tele/device/SENSOR
-                prefix = parts[0]  # tele, stat, cmnd
-                device_topic = parts[1]
-                suffix = "/".join(parts[2:])
-                is_tasmota = True
-            
-            # Generic/Custom topic handling fallback
-            if not is_tasmota:
-                 device_topic = topic
+            device_topic, prefix, suffix = _parse_topic(topic)
 
             async with database.AsyncSessionLocal() as db:
                 # Fetch existing device to get old attributes
-                existing_device = await crud.get_device_by_topic(db, device_topic)
-                old_attributes = existing_device.attributes.copy() if existing_device and existing_device.attributes else {}
+                existing_device = await self._load_device(db, device_topic)
+                # Handlers never mutate attributes in place, so no defensive copy is needed
+                old_attributes = existing_device.attributes if existing_device and existing_device.attributes else {}
                 
-                updated_device = None
-
-                if is_tasmota:
-                    # 1. LWT - Online/Offline Status
-                    if prefix == "tele" and suffix == "LWT":
-                        is_online = (payload == "Online")
-                        updated_device = await crud.create_or_update_device(db, {
-                            "mqtt_topic": device_topic,
-                            "is_online": is_online
-                        })
-                        
-                        if is_online:
-                            # Request full status
-                            await self.publish(f"cmnd/{device_topic}/STATUS", "0")
-
-                    # 2. STATUS0 - Full Metadata
-                    elif prefix == "stat" and suffix == "STATUS0":
-                        data = json.loads(payload)
-                        status = data.get("Status", {})
-                        status_net = data.get("StatusNET", {})
-                        
-                        device_name = status.get("DeviceName", device_topic)
-                        friendly_name_val = status.get("FriendlyName", [device_name])
-                        if isinstance(friendly_name_val, list) and len(friendly_name_val) > 0:
-                            friendly_name = friendly_name_val[0]
-                        else:
-                            friendly_name = str(friendly_name_val)
-                        ip_address = status_net.get("IPAddress")
-                        
-                        updated_device = await crud.create_or_update_device(db, {
-                            "mqtt_topic": device_topic,
-                            "name": friendly_name,
-                            "ip_address": ip_address,
-                            "is_online": True,
-                            "attributes": data
-                        })
-
-                    # 3. STATE - Telemetry (Power, Wifi, etc.)
-                    elif prefix == "tele" and suffix == "STATE":
-                        data = json.loads(payload)
-                        updated_device = await crud.create_or_update_device(db, {
-                            "mqtt_topic": device_topic,
-                            "is_online": True,
-                            "attributes": data
-                        })
-
-                    # 4. SENSOR - Sensor Data
-                    elif prefix == "tele" and suffix == "SENSOR":
-                        data = json.loads(payload)
-                        
-                        # Merge sensor data into existing attributes
-                        merged_attrs = old_attributes.copy()
-                        merged_attrs.update(data)
-                        
-                        updated_device = await crud.create_or_update_device(db, {
-                            "mqtt_topic": device_topic,
-                            "is_online": True,
-                            "attributes": merged_attrs
-                        })
-                        
-                        # Store history
-                        await crud.create_sensor_data(db, updated_device.id, data)
-                        
-                    # 5. RESULT - Command feedback (Power state change)
-                    elif prefix == "stat" and suffix == "RESULT":
-                        data = json.loads(payload)
-                        # Merge new result into attributes
-                        merged_attrs = old_attributes.copy()
-                        merged_attrs.update(data)
-                        updated_device = await crud.create_or_update_device(db, {
-                            "mqtt_topic": device_topic,
-                            "attributes": merged_attrs
-                        })
+                if prefix is None:
+                    handler = MQTTService._handle_generic
                 else:
-                    # Generic / Custom Topic Handling
-                    try:
-                        data = json.loads(payload)
-                    except:
-                        data = {"value": payload}
-                    
-                    merged_attrs = old_attributes.copy()
-                    if isinstance(data, dict):
-                        merged_attrs.update(data)
-                    
-                    updated_device = await crud.create_or_update_device(db, {
-                        "mqtt_topic": device_topic,
-                        "is_online": True,
-                        "attributes": merged_attrs
-                    })
-                    
-                    # Store history for custom topics too
-                    await crud.create_sensor_data(db, updated_device.id, data if isinstance(data, dict) else {"value": payload})
+                    handler = _HANDLERS.get((prefix, suffix))
+                updated_device = None
+                if handler:
+                    updated_device = await handler(self, db, existing_device, device_topic, payload, old_attributes)
+                    if updated_device is None:
+                        # Nothing changed: skip the write and the device_update broadcast
+                        return
 
                 # Notify automation engine of device state change
                 if updated_device:
@@ -253,27 +325,27 @@ class MQTTService:
                     # updated_device.attributes contains the NEW state
                     # old_attributes contains the OLD state
                     
-                    new_timers = updated_device.active_timers.copy() if updated_device.active_timers else {}
-                    timers_changed = False
-                    
-                    current_attrs = updated_device.attributes or {}
-                    
-                    # Iterate over all keys to find POWER*
-                    for key, value in current_attrs.items():
-                        if key.startswith("POWER"):
+                    active_timers = updated_device.active_timers
+                    if active_timers:
+                        current_attrs = updated_device.attributes or {}
+                        new_timers = None
+                        
+                        # Only switches with a running timer matter, so scan those instead of every attribute
+                        for key in active_timers:
+                            if not key.startswith("POWER"):
+                                continue
+                            value = current_attrs.get(key)
                             # Check if it is OFF
-                            if str(value).upper() == "OFF":
-                                # If it was ON before (or we just want to be safe), and there is a timer, remove it
-                                if key in new_timers:
-                                    logger.info(f"Manual OFF detected for {updated_device.mqtt_topic}/{key}. Cancelling timer.")
-                                    del new_timers[key]
-                                    timers_changed = True
-                    
-                    if timers_changed:
-                        await crud.create_or_update_device(db, {
-                            "mqtt_topic": updated_device.mqtt_topic,
-                            "active_timers": new_timers
-                        })
+                            if isinstance(value, str) and value.upper() == "OFF":
+                                logger.info(f"Manual OFF detected for {updated_device.mqtt_topic}/{key}. Cancelling timer.")
+                                if new_timers is None:
+                                    new_timers = active_timers.copy()
+                                del new_timers[key]
+                        
+                        if new_timers is not None:
+                            await self._stage_device_update(db, updated_device, device_topic, {
+                                "active_timers": new_timers
+                            })
 
                     logger.info(f"Calling handle_device_state_change for device {updated_device.id}")
                     await automation_engine.handle_device_state_change(
@@ -282,25 +354,126 @@ class MQTTService:
                         updated_device.attributes
                     )
             
-            # Broadcast update to ensure frontend has latest state
-            broadcast_msg = {"type": "device_update"}
-            if updated_device:
-                try:
-                    # Use Pydantic to serialize
-                    device_data = schemas.Device.model_validate(updated_device).model_dump()
-                    # Convert datetime objects to strings if necessary (model_dump might keep them as objects)
-                    # But json.dumps (used by manager.broadcast) needs strings. 
-                    # Pydantic's model_dump(mode='json') handles this in v2.
-                    device_data = schemas.Device.model_validate(updated_device).model_dump(mode='json')
-                    broadcast_msg["device"] = device_data
-                except Exception as e:
-                    logger.error(f"Error serializing device for broadcast: {e}")
+            # Broadcast update to ensure frontend has latest state (skip serializing when nobody listens)
+            if manager.has_clients():
+                broadcast_msg = {"type": "device_update"}
+                if updated_device:
+                    try:
+                        # Use Pydantic to serialize; mode='json' gives JSON-safe values for manager.broadcast
+                        device_data = schemas.Device.model_validate(updated_device).model_dump(mode='json')
+                        broadcast_msg["device"] = device_data
+                    except Exception as e:
+                        logger.error(f"Error serializing device for broadcast: {e}")
             
-            await manager.broadcast(broadcast_msg)
+                self._broadcast_nowait(broadcast_msg)
 
         except Exception as e:
             logger.error(f"Error handling message {topic}: {e}")
 
+    # Per-topic handlers: (db, device, device_topic, payload, old_attributes) -> updated device
+
+    async def _handle_lwt(self, db, device, device_topic, payload, old_attributes):
+        """LWT - Online/Offline Status"""
+        is_online = (payload == "Online")
+        updated_device = await self._stage_device_update(db, device, device_topic, {
+            "is_online": is_online
+        })
+        
+        if is_online:
+            # Request full status
+            await self.publish(f"cmnd/{device_topic}/STATUS", "0")
+        return updated_device
+
+    async def _handle_status0(self, db, device, device_topic, payload, old_attributes):
+        """STATUS0 - Full Metadata"""
+        data = json_codec.loads(payload)
+        status = data.get("Status", {})
+        status_net = data.get("StatusNET", {})
+        
+        device_name = status.get("DeviceName", device_topic)
+        friendly_name_val = status.get("FriendlyName", [device_name])
+        if isinstance(friendly_name_val, list) and len(friendly_name_val) > 0:
+            friendly_name = friendly_name_val[0]
+        else:
+            friendly_name = str(friendly_name_val)
+        ip_address = status_net.get("IPAddress")
+        
+        return await self._stage_device_update(db, device, device_topic, {
+            "name": friendly_name,
+            "ip_address": ip_address,
+            "is_online": True,
+            "attributes": data
+        })
+
+    async def _handle_state(self, db, device, device_topic, payload, old_attributes):
+        """STATE - Telemetry (Power, Wifi, etc.)"""
+        data = json_codec.loads(payload)
+        return await self._stage_device_update(db, device, device_topic, {
+            "is_online": True,
+            "attributes": data
+        })
+
+    async def _handle_sensor(self, db, device, device_topic, payload, old_attributes):
+        """SENSOR - Sensor Data (returns None when the frame changes nothing)"""
+        data = json_codec.loads(payload)
+        
+        # Many SENSOR frames repeat the last reading; keep the history sample but skip the rest
+        if device is not None and device.is_online and all(
+            key in old_attributes and old_attributes[key] == value for key, value in data.items()
+        ):
+            self.enqueue_sensor_data(device.id, data)
+            # Duration triggers still count identical readings as the condition holding
+            from .automation_engine import automation_engine
+            await automation_engine.handle_device_state_change(device.id, old_attributes, old_attributes)
+            return None
+        
+        # Merge sensor data into existing attributes
+        merged_attrs = {**old_attributes, **data}
+        
+        updated_device = await self._stage_device_update(db, device, device_topic, {
+            "is_online": True,
+            "attributes": merged_attrs
+        })
+        
+        # Store history
+        self.enqueue_sensor_data(updated_device.id, data)
+        return updated_device
+
+    async def _handle_result(self, db, device, device_topic, payload, old_attributes):
+        """RESULT - Command feedback (Power state change)"""
+        data = json_codec.loads(payload)
+        # Merge new result into attributes
+        merged_attrs = old_attributes.copy()
+        merged_attrs.update(data)
+        return await self._stage_device_update(db, device, device_topic, {
+            "attributes": merged_attrs
+        })
+
+    async def _handle_generic(self, db, device, device_topic, payload, old_attributes):
+        """Generic / Custom Topic Handling"""
+        # Only attempt a decode when the payload can start a JSON value; plain strings like "ON" skip the raise
+        stripped = payload.lstrip()
+        if stripped and stripped[0] in _JSON_START:
+            try:
+                data = json_codec.loads(payload)
+            except json_codec.JSONDecodeError:
+                data = {"value": payload}
+        else:
+            data = {"value": payload}
+        
+        merged_attrs = old_attributes.copy()
+        if isinstance(data, dict):
+            merged_attrs.update(data)
+        
+        updated_device = await self._stage_device_update(db, device, device_topic, {
+            "is_online": True,
+            "attributes": merged_attrs
+        })
+        
+        # Store history for custom topics too
+        self.enqueue_sensor_data(updated_device.id, data if isinstance(data, dict) else {"value": payload})
+        return updated_device
+
     async def publish(self, topic: str, payload: str):
         if self.client and self.is_connected:
             await self.client.publish(topic, payload)
@@ -324,6 +497,14 @@ class MQTTService:
                 task.cancel()
         self._tasks.clear()
         self.is_connected = False
+        
+        # Stop the history writer, let a batch it was writing finish, then write what is still queued
+        if self._sensor_writer is not None:
+            self._sensor_writer.cancel()
+            await asyncio.gather(self._sensor_writer, return_exceptions=True)
+            self._sensor_writer = None
+        await asyncio.gather(*self._writes, return_exceptions=True)
+        await self._flush_sensor_queue()
 
     async def restart(self):
         logger.info("Restarting MQTT Service...")
@@ -332,4 +513,12 @@ class MQTTService:
         await asyncio.sleep(1)
         await self.start()
 
+_HANDLERS = {
+    ("tele", "LWT"): MQTTService._handle_lwt,
+    ("stat", "STATUS0"): MQTTService._handle_status0,
+    ("tele", "STATE"): MQTTService._handle_state,
+    ("tele", "SENSOR"): MQTTService._handle_sensor,
+    ("stat", "RESULT"): MQTTService._handle_result,
+}
+
 mqtt_service = MQTTService()
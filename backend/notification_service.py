@@ -1,41 +1,106 @@
+import asyncio
+import base64
+import functools
 import logging
 import aiohttp
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.future import select
 from . import models, database
 
 logger = logging.getLogger(__name__)
 
+# Config edits arriving within this window are folded into one reload
+RELOAD_DEBOUNCE = 0.1  # seconds
+
+@functools.lru_cache(maxsize=32)
+def _telegram_url(bot_token: str) -> str:
+    return f"https://api.telegram.org/bot{bot_token}/sendMessage"
+
+@functools.lru_cache(maxsize=32)
+def _basic_auth(username: str, password: str) -> str:
+    return "Basic " + base64.b64encode(f"{username}:{password}".encode()).decode()
+
 class NotificationService:
     def __init__(self):
         self.configs: List[models.NotificationConfig] = []
+        # Snapshot built by load_config: event type -> (provider, provider config) of enabled configs
+        self._by_event: Dict[str, Tuple[Tuple[str, Dict[str, Any]], ...]] = {}
+        # Bumped by invalidate(); configs are reloaded when the loaded version is behind
+        self._version = 0
+        self._loaded_version = -1
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._reload_event = asyncio.Event()
+        self._reloader: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Load configurations and start the background reloader"""
+        await self.load_config()
+        if self._reloader is None or self._reloader.done():
+            self._reloader = asyncio.create_task(self._reload_loop())
+
+    async def _reload_loop(self):
+        """Reload configurations once per burst of invalidate() calls"""
+        while True:
+            await self._reload_event.wait()
+            await asyncio.sleep(RELOAD_DEBOUNCE)
+            self._reload_event.clear()
+            try:
+                await self.load_config()
+            except Exception as e:
+                logger.error(f"Error reloading notification configurations: {e}")
 
     async def load_config(self):
         """Load notification configurations from database"""
+        version = self._version
         async with database.AsyncSessionLocal() as db:
             result = await db.execute(select(models.NotificationConfig))
             self.configs = result.scalars().all()
+            by_event: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+            for config in self.configs:
+                if not config.enabled:
+                    continue
+                for event_type in config.events or ():
+                    by_event.setdefault(event_type, []).append((config.provider, config.config))
+            self._by_event = {event_type: tuple(targets) for event_type, targets in by_event.items()}
+            self._loaded_version = version
             logger.info(f"Loaded {len(self.configs)} notification configurations")
 
+    def invalidate(self):
+        """Mark cached configurations stale; they are reloaded in the background"""
+        self._version += 1
+        self._reload_event.set()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session so provider connections are kept alive between notifications"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=75),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._session
+
+    async def stop(self):
+        if self._reloader:
+            self._reloader.cancel()
+            self._reloader = None
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     async def notify(self, event_type: str, message: str):
         """Send notification to all enabled providers for the given event type"""
-        # Reload config to ensure we have latest settings
-        await self.load_config()
+        # Served from the in-memory snapshot; the DB is only read before the first load
+        if self._loaded_version < 0:
+            await self.load_config()
         
-        for config in self.configs:
-            if not config.enabled:
-                continue
-                
-            if event_type not in config.events:
-                continue
-                
+        for provider, config in self._by_event.get(event_type, ()):
             try:
-                if config.provider == "telegram":
-                    await self.send_telegram(message, config.config)
-                elif config.provider == "ntfy":
-                    await self.send_ntfy(message, config.config)
+                if provider == "telegram":
+                    await self.send_telegram(message, config)
+                elif provider == "ntfy":
+                    await self.send_ntfy(message, config)
             except Exception as e:
-                logger.error(f"Failed to send {config.provider} notification: {e}")
+                logger.error(f"Failed to send {provider} notification: {e}")
 
     async def send_telegram(self, message: str, config: Dict[str, Any]):
         """Send Telegram notification"""
@@ -46,19 +111,18 @@ class NotificationService:
             logger.warning("Telegram config missing bot_token or chat_id")
             return
 
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+        url = _telegram_url(bot_token)
         payload = {
             "chat_id": chat_id,
             "text": message,
             "parse_mode": "HTML"
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as response:
-                if response.status != 200:
-                    text = await response.text()
-                    raise Exception(f"Telegram API error: {text}")
-                logger.info("Telegram notification sent")
+        async with self._get_session().post(url, json=payload) as response:
+            if response.status != 200:
+                text = await response.text()
+                raise Exception(f"Telegram API error: {text}")
+            logger.info("Telegram notification sent")
 
     async def send_ntfy(self, message: str, config: Dict[str, Any]):
         """Send ntfy.sh notification"""
@@ -79,17 +143,13 @@ class NotificationService:
         username = config.get("username")
         password = config.get("password")
         if username and password:
-            import base64
-            auth_str = f"{username}:{password}"
-            b64_auth = base64.b64encode(auth_str.encode()).decode()
-            headers["Authorization"] = f"Basic {b64_auth}"
+            headers["Authorization"] = _basic_auth(username, password)
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, data=message, headers=headers) as response:
-                if response.status != 200:
-                    text = await response.text()
-                    raise Exception(f"Ntfy API error: {text}")
-                logger.info("Ntfy notification sent")
+        async with self._get_session().post(url, data=message, headers=headers) as response:
+            if response.status != 200:
+                text = await response.text()
+                raise Exception(f"Ntfy API error: {text}")
+            logger.info("Ntfy notification sent")
 
 
 # Global instance
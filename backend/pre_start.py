@@ -1,9 +1,13 @@
 import asyncio
 import asyncpg
 import os
+import re
 from urllib.parse import urlparse
 import sys
 
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
 async def init_db():
     db_url = os.getenv("DATABASE_URL")
     if not db_url:
@@ -28,6 +32,11 @@ async def init_db():
             print("No database name specified in DATABASE_URL.")
             return
 
+        # CREATE DATABASE can't take a bind parameter, so only plain identifiers are accepted
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", dbname):
+            print(f"Refusing to create database with unsupported name '{dbname}'.")
+            return
+
         print(f"Checking if database '{dbname}' exists on {host}:{port}...")
 
         # Connect to 'postgres' database to perform checks/creation
@@ -47,10 +56,10 @@ async def init_db():
             return
 
         try:
-            exists = await sys_conn.fetchval(f"SELECT 1 FROM pg_database WHERE datname = '{dbname}'")
+            exists = await sys_conn.fetchval("SELECT 1 FROM pg_database WHERE datname = $1", dbname)
             if not exists:
                 print(f"Database '{dbname}' does not exist. Creating...")
-                await sys_conn.execute(f'CREATE DATABASE "{dbname}"')
+                await sys_conn.execute(f"CREATE DATABASE {_quote_ident(dbname)}")
                 print(f"Database '{dbname}' created successfully.")
             else:
                 print(f"Database '{dbname}' already exists.")
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
-from typing import List
+from sqlalchemy.orm import aliased
+from sqlalchemy import delete, func, insert, update
+from typing import Dict, List
 from .. import database, schemas, models
 
 router = APIRouter(
@@ -17,59 +18,95 @@ async def read_automations(db: AsyncSession = Depends(database.get_db)):
 
 @router.post("", response_model=schemas.Automation)
 async def create_automation(automation: schemas.AutomationCreate, db: AsyncSession = Depends(database.get_db)):
-    db_automation = models.Automation(**automation.dict())
-    db.add(db_automation)
+    result = await db.execute(
+        insert(models.Automation)
+        .values(**automation.model_dump())
+        .returning(models.Automation)
+    )
+    db_automation = result.scalar_one()
     await db.commit()
-    await db.refresh(db_automation)
+    
+    from ..automation_engine import automation_engine
+    automation_engine.apply_delta(db_automation.id, "upsert", db_automation)
     return db_automation
 
+@router.get("/logs/latest", response_model=Dict[int, List[schemas.AutomationLog]])
+async def get_latest_automation_logs(ids: List[int] = Query(...), per: int = 10, db: AsyncSession = Depends(database.get_db)):
+    """Last `per` logs for each of the given automations in a single query"""
+    rn = func.row_number().over(
+        partition_by=models.AutomationLog.automation_id,
+        order_by=models.AutomationLog.timestamp.desc()
+    ).label("rn")
+    ranked = (
+        select(models.AutomationLog, rn)
+        .filter(models.AutomationLog.automation_id.in_(ids))
+        .subquery()
+    )
+    log = aliased(models.AutomationLog, ranked)
+    result = await db.execute(
+        select(log)
+        .filter(ranked.c.rn <= per)
+        .order_by(ranked.c.automation_id, ranked.c.rn)
+    )
+    
+    logs: Dict[int, List[models.AutomationLog]] = {automation_id: [] for automation_id in ids}
+    for entry in result.scalars():
+        logs[entry.automation_id].append(entry)
+    return logs
+
 @router.put("/{automation_id}", response_model=schemas.Automation)
 async def update_automation(automation_id: int, automation: schemas.AutomationCreate, db: AsyncSession = Depends(database.get_db)):
-    result = await db.execute(select(models.Automation).filter(models.Automation.id == automation_id))
-    db_automation = result.scalars().first()
+    result = await db.execute(
+        update(models.Automation)
+        .where(models.Automation.id == automation_id)
+        .values(**automation.model_dump())
+        .returning(models.Automation)
+    )
+    db_automation = result.scalar_one_or_none()
     if not db_automation:
         raise HTTPException(status_code=404, detail="Automation not found")
     
-    for key, value in automation.dict().items():
-        setattr(db_automation, key, value)
-    
     await db.commit()
-    await db.refresh(db_automation)
+    
+    from ..automation_engine import automation_engine
+    automation_engine.apply_delta(automation_id, "upsert", db_automation)
     return db_automation
 
 @router.delete("/{automation_id}")
 async def delete_automation(automation_id: int, db: AsyncSession = Depends(database.get_db)):
-    result = await db.execute(select(models.Automation).filter(models.Automation.id == automation_id))
-    db_automation = result.scalars().first()
-    if not db_automation:
+    # Logs are removed by the ON DELETE CASCADE foreign key
+    result = await db.execute(
+        delete(models.Automation)
+        .where(models.Automation.id == automation_id)
+        .returning(models.Automation.id)
+    )
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Automation not found")
-    
-    # Delete associated logs first to avoid foreign key violation
-    await db.execute(delete(models.AutomationLog).where(models.AutomationLog.automation_id == automation_id))
-    
-    await db.delete(db_automation)
     await db.commit()
     
-    # Reload automations in the engine
+    # Drop it from the engine
     from ..automation_engine import automation_engine
-    await automation_engine.reload_automations()
+    automation_engine.apply_delta(automation_id, "delete")
     
     return {"status": "success"}
 
 @router.post("/{automation_id}/toggle", response_model=schemas.Automation)
 async def toggle_automation(automation_id: int, db: AsyncSession = Depends(database.get_db)):
-    result = await db.execute(select(models.Automation).filter(models.Automation.id == automation_id))
-    db_automation = result.scalars().first()
+    # Flip the flag in one UPDATE ... RETURNING instead of SELECT + UPDATE
+    result = await db.execute(
+        update(models.Automation)
+        .where(models.Automation.id == automation_id)
+        .values(enabled=~models.Automation.enabled)
+        .returning(models.Automation)
+    )
+    db_automation = result.scalar_one_or_none()
     if not db_automation:
         raise HTTPException(status_code=404, detail="Automation not found")
-    
-    db_automation.enabled = not db_automation.enabled
     await db.commit()
-    await db.refresh(db_automation)
     
-    # Reload automations in the engine
+    # Update the engine in place
     from ..automation_engine import automation_engine
-    await automation_engine.reload_automations()
+    automation_engine.apply_delta(automation_id, "toggle", db_automation)
     
     return db_automation
 
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from datetime import datetime, timedelta, timezone
 from .. import database, schemas, crud, models
 from ..mqtt_service import mqtt_service
+from ..notification_service import notification_service
+from ..timer_service import timer_service
 from ..websocket_manager import manager
 
 router = APIRouter(
@@ -17,19 +20,15 @@ async def read_devices(skip: int = 0, limit: int = 100, db: AsyncSession = Depen
 
 @router.get("/{device_id}", response_model=schemas.Device)
 async def read_device(device_id: int, db: AsyncSession = Depends(database.get_db)):
-    # We need a get_device_by_id in crud, but for now let's filter
-    # Optimization: Add get_device(id) to crud later
-    devices = await crud.get_devices(db, skip=0, limit=1000)
-    for d in devices:
-        if d.id == device_id:
-            return d
-    raise HTTPException(status_code=404, detail="Device not found")
+    device = await crud.get_device(db, device_id)
+    if not device:
+        raise HTTPException(status_code=404, detail="Device not found")
+    return device
 
 @router.post("/{device_id}/command")
 async def send_command(device_id: int, command: str, payload: str, db: AsyncSession = Depends(database.get_db)):
     # Find device topic
-    devices = await crud.get_devices(db, skip=0, limit=1000)
-    device = next((d for d in devices if d.id == device_id), None)
+    device = await crud.get_device(db, device_id)
     
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
@@ -49,8 +48,7 @@ async def scan_devices():
 @router.put("/{device_id}", response_model=schemas.Device)
 async def update_device(device_id: int, device_update: schemas.DeviceBase, db: AsyncSession = Depends(database.get_db)):
     # Check if device exists
-    devices = await crud.get_devices(db, skip=0, limit=1000)
-    device = next((d for d in devices if d.id == device_id), None)
+    device = await crud.get_device(db, device_id)
     
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
@@ -63,6 +61,11 @@ async def update_device(device_id: int, device_update: schemas.DeviceBase, db: A
         update_data["mqtt_topic"] = device.mqtt_topic
         
     updated_device = await crud.create_or_update_device(db, update_data)
+    
+    # Drop the automation engine's cached copy of this device
+    from ..automation_engine import automation_engine
+    automation_engine.invalidate_device(device_id)
+    
     return updated_device
 
 @router.post("/{device_id}/timer")
@@ -75,10 +78,7 @@ async def set_timer(
     db: AsyncSession = Depends(database.get_db)
 ):
     """Set a timer to auto-off a switch after specified duration"""
-    from datetime import datetime, timedelta, timezone
-    
-    devices = await crud.get_devices(db, skip=0, limit=1000)
-    device = next((d for d in devices if d.id == device_id), None)
+    device = await crud.get_device(db, device_id)
     
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
@@ -100,17 +100,16 @@ async def set_timer(
         await mqtt_service.publish(full_topic, "ON")
         
         # Send notification for timer start (background task)
-        from ..notification_service import notification_service
         duration_str = f"{duration_minutes}m {duration_seconds}s" if duration_minutes else f"{duration_seconds}s"
         message = f"Timer started for {device.name}/{switch}: {duration_str}. Switch turned ON."
         background_tasks.add_task(notification_service.notify, "timer", message)
         
         # Update device
-        update_data = {"mqtt_topic": device.mqtt_topic, "active_timers": active_timers}
-        updated_device = await crud.create_or_update_device(db, update_data)
+        updated_device = await crud.set_device_timers(db, device, active_timers)
+        timer_service.schedule(device.id, switch, end_time)
         
         # Notify frontend via WebSocket
-        await manager.broadcast({"type": "device_update"})
+        manager.schedule_broadcast({"type": "device_update"})
         
         return {"status": "timer_set", "switch": switch, "end_time": end_time.isoformat(), "device": updated_device}
     except HTTPException:
@@ -122,10 +121,14 @@ async def set_timer(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{device_id}/timer/{switch}")
-async def cancel_timer(device_id: int, switch: str, db: AsyncSession = Depends(database.get_db)):
+async def cancel_timer(
+    device_id: int,
+    switch: str,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(database.get_db)
+):
     """Cancel an active timer for a switch"""
-    devices = await crud.get_devices(db, skip=0, limit=1000)
-    device = next((d for d in devices if d.id == device_id), None)
+    device = await crud.get_device(db, device_id)
     
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
@@ -138,20 +141,18 @@ async def cancel_timer(device_id: int, switch: str, db: AsyncSession = Depends(d
     
     # Send notification if timer was cancelled
     if timer_was_active:
-        from ..notification_service import notification_service
-        await notification_service.notify("timer", f"Timer cancelled manually for {device.name}/{switch}.")
+        background_tasks.add_task(notification_service.notify, "timer", f"Timer cancelled manually for {device.name}/{switch}.")
     
     # Update device
-    update_data = {"mqtt_topic": device.mqtt_topic, "active_timers": active_timers}
-    updated_device = await crud.create_or_update_device(db, update_data)
+    updated_device = await crud.set_device_timers(db, device, active_timers)
     
     # Notify frontend via WebSocket
-    await manager.broadcast({"type": "device_update"})
+    manager.schedule_broadcast({"type": "device_update"})
     
     return {"status": "timer_cancelled", "switch": switch, "device": updated_device}
 
-@router.get("/{device_id}/history")
+@router.get("/{device_id}/history", response_model=List[schemas.SensorReading])
 async def get_device_history(device_id: int, limit: int = 100, hours: int = None, db: AsyncSession = Depends(database.get_db)):
     """Get historical sensor data for a device"""
-    history = await crud.get_sensor_history(db, device_id, limit, hours)
+    history = await crud.get_sensor_history_raw(db, device_id, limit, hours)
     return history
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import bindparam
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from .. import models, database
 from ..notification_service import notification_service
 
@@ -11,6 +12,11 @@ router = APIRouter(
     tags=["notifications"],
 )
 
+# Built once so SQLAlchemy's compiled cache is hit on every request
+_ALL_CONFIGS = select(models.NotificationConfig)
+_CONFIG_BY_PROVIDER = select(models.NotificationConfig).where(models.NotificationConfig.provider == bindparam("provider"))
+_CONFIG_BY_ID = select(models.NotificationConfig).where(models.NotificationConfig.id == bindparam("config_id"))
+
 class NotificationConfigBase(BaseModel):
     provider: str
     enabled: bool
@@ -23,8 +29,7 @@ class NotificationConfigCreate(NotificationConfigBase):
 class NotificationConfigResponse(NotificationConfigBase):
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class TestNotificationRequest(BaseModel):
     provider: str
@@ -32,15 +37,13 @@ class TestNotificationRequest(BaseModel):
 
 @router.get("/", response_model=List[NotificationConfigResponse])
 async def get_notification_configs(db: AsyncSession = Depends(database.get_db)):
-    result = await db.execute(select(models.NotificationConfig))
+    result = await db.execute(_ALL_CONFIGS)
     return result.scalars().all()
 
 @router.post("/", response_model=NotificationConfigResponse)
 async def create_notification_config(config: NotificationConfigCreate, db: AsyncSession = Depends(database.get_db)):
     # Check if config for this provider already exists
-    result = await db.execute(
-        select(models.NotificationConfig).filter(models.NotificationConfig.provider == config.provider)
-    )
+    result = await db.execute(_CONFIG_BY_PROVIDER, {"provider": config.provider})
     existing_config = result.scalars().first()
     
     if existing_config:
@@ -51,25 +54,23 @@ async def create_notification_config(config: NotificationConfigCreate, db: Async
         await db.commit()
         await db.refresh(existing_config)
         
-        # Reload service config
-        await notification_service.load_config()
+        # Reload service config on next notification
+        notification_service.invalidate()
         return existing_config
     else:
         # Create new
-        db_config = models.NotificationConfig(**config.dict())
+        db_config = models.NotificationConfig(**config.model_dump())
         db.add(db_config)
         await db.commit()
         await db.refresh(db_config)
         
-        # Reload service config
-        await notification_service.load_config()
+        # Reload service config on next notification
+        notification_service.invalidate()
         return db_config
 
 @router.delete("/{config_id}")
 async def delete_notification_config(config_id: int, db: AsyncSession = Depends(database.get_db)):
-    result = await db.execute(
-        select(models.NotificationConfig).filter(models.NotificationConfig.id == config_id)
-    )
+    result = await db.execute(_CONFIG_BY_ID, {"config_id": config_id})
     config = result.scalars().first()
     if not config:
         raise HTTPException(status_code=404, detail="Configuration not found")
@@ -77,8 +78,8 @@ async def delete_notification_config(config_id: int, db: AsyncSession = Depends(
     await db.delete(config)
     await db.commit()
     
-    # Reload service config
-    await notification_service.load_config()
+    # Reload service config on next notification
+    notification_service.invalidate()
     return {"message": "Configuration deleted"}
 
 @router.post("/test")
@@ -1,39 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import bindparam
 from sqlalchemy.future import select
 from typing import List
-from .. import models, database, crud
+from .. import models, database, crud, schemas
 
 router = APIRouter(prefix="/api/schedules", tags=["schedules"])
 
-@router.get("", response_model=List[dict])
+# Built once so SQLAlchemy's compiled cache is hit on every request
+_SCHEDULE_BY_ID = select(models.Schedule).where(models.Schedule.id == bindparam("sid"))
+
+# Column projection for the list endpoint - rows come back as plain mappings, no ORM instances
+_SCHEDULE_LIST = select(
+    *(getattr(models.Schedule, field) for field in schemas.ScheduleResponse.model_fields)
+)
+
+@router.get("", response_model=List[schemas.ScheduleResponse])
 async def get_schedules(db: AsyncSession = Depends(database.get_db)):
     """Get all schedules"""
-    result = await db.execute(select(models.Schedule))
-    schedules = result.scalars().all()
-    return [
-        {
-            "id": s.id,
-            "name": s.name,
-            "enabled": s.enabled,
-            "device_id": s.device_id,
-            "switch_name": s.switch_name,
-            "schedule_type": s.schedule_type,
-            "time": s.time,
-            "days_of_week": s.days_of_week,
-            "date": s.date,
-            "duration": s.duration,
-            "duration_unit": s.duration_unit,
-            "interval_value": s.interval_value,
-            "interval_unit": s.interval_unit,
-            "total_duration_value": s.total_duration_value,
-            "total_duration_unit": s.total_duration_unit,
-            "action": s.action
-        }
-        for s in schedules
-    ]
+    result = await db.execute(_SCHEDULE_LIST)
+    return result.mappings().all()
 
-@router.post("", response_model=dict)
+@router.post("", response_model=schemas.ScheduleResponse)
 async def create_schedule(
     name: str,
     device_id: int,
@@ -76,25 +64,9 @@ async def create_schedule(
     from ..schedule_engine import schedule_engine
     await schedule_engine.reload_schedules()
     
-    return {
-        "id": schedule.id,
-        "name": schedule.name,
-        "enabled": schedule.enabled,
-        "device_id": schedule.device_id,
-        "switch_name": schedule.switch_name,
-        "schedule_type": schedule.schedule_type,
-        "time": schedule.time,
-        "days_of_week": schedule.days_of_week,
-        "date": schedule.date,
-        "duration": schedule.duration,
-        "interval_value": schedule.interval_value,
-        "interval_unit": schedule.interval_unit,
-        "total_duration_value": schedule.total_duration_value,
-        "total_duration_unit": schedule.total_duration_unit,
-        "action": schedule.action
-    }
+    return schedule
 
-@router.put("/{schedule_id}", response_model=dict)
+@router.put("/{schedule_id}", response_model=schemas.ScheduleResponse)
 async def update_schedule(
     schedule_id: int,
     name: str = None,
@@ -114,7 +86,7 @@ async def update_schedule(
     db: AsyncSession = Depends(database.get_db)
 ):
     """Update a schedule"""
-    result = await db.execute(select(models.Schedule).filter(models.Schedule.id == schedule_id))
+    result = await db.execute(_SCHEDULE_BY_ID, {"sid": schedule_id})
     schedule = result.scalars().first()
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
@@ -155,28 +127,12 @@ async def update_schedule(
     from ..schedule_engine import schedule_engine
     await schedule_engine.reload_schedules()
     
-    return {
-        "id": schedule.id,
-        "name": schedule.name,
-        "enabled": schedule.enabled,
-        "device_id": schedule.device_id,
-        "switch_name": schedule.switch_name,
-        "schedule_type": schedule.schedule_type,
-        "time": schedule.time,
-        "days_of_week": schedule.days_of_week,
-        "date": schedule.date,
-        "duration": schedule.duration,
-        "interval_value": schedule.interval_value,
-        "interval_unit": schedule.interval_unit,
-        "total_duration_value": schedule.total_duration_value,
-        "total_duration_unit": schedule.total_duration_unit,
-        "action": schedule.action
-    }
+    return schedule
 
 @router.delete("/{schedule_id}")
 async def delete_schedule(schedule_id: int, db: AsyncSession = Depends(database.get_db)):
     """Delete a schedule"""
-    result = await db.execute(select(models.Schedule).filter(models.Schedule.id == schedule_id))
+    result = await db.execute(_SCHEDULE_BY_ID, {"sid": schedule_id})
     schedule = result.scalars().first()
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
@@ -190,10 +146,10 @@ async def delete_schedule(schedule_id: int, db: AsyncSession = Depends(database.
     
     return {"status": "deleted"}
 
-@router.post("/{schedule_id}/toggle", response_model=dict)
+@router.post("/{schedule_id}/toggle", response_model=schemas.ScheduleResponse)
 async def toggle_schedule(schedule_id: int, db: AsyncSession = Depends(database.get_db)):
     """Toggle schedule enabled/disabled"""
-    result = await db.execute(select(models.Schedule).filter(models.Schedule.id == schedule_id))
+    result = await db.execute(_SCHEDULE_BY_ID, {"sid": schedule_id})
     schedule = result.scalars().first()
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
@@ -206,20 +162,4 @@ async def toggle_schedule(schedule_id: int, db: AsyncSession = Depends(database.
     from ..schedule_engine import schedule_engine
     await schedule_engine.reload_schedules()
     
-    return {
-        "id": schedule.id,
-        "name": schedule.name,
-        "enabled": schedule.enabled,
-        "device_id": schedule.device_id,
-        "switch_name": schedule.switch_name,
-        "schedule_type": schedule.schedule_type,
-        "time": schedule.time,
-        "days_of_week": schedule.days_of_week,
-        "date": schedule.date,
-        "duration": schedule.duration,
-        "interval_value": schedule.interval_value,
-        "interval_unit": schedule.interval_unit,
-        "total_duration_value": schedule.total_duration_value,
-        "total_duration_unit": schedule.total_duration_unit,
-        "action": schedule.action
-    }
+    return schedule
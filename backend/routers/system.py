@@ -1,12 +1,13 @@
 from fastapi import APIRouter
 from datetime import datetime
+import time
 
 router = APIRouter(prefix="/api/system", tags=["system"])
 
-@router.get("/time")
-async def get_server_time():
-    """Get current server time"""
-    now = datetime.now()
+# (wall-clock second, response) - the payload only changes once a second
+_cached_time = (0, None)
+
+def _build_server_time(now: datetime) -> dict:
     return {
         "datetime": now.isoformat(),
         "date": now.strftime("%Y-%m-%d"),
@@ -14,3 +15,13 @@ async def get_server_time():
         "timezone": now.astimezone().tzname(),
         "weekday": now.weekday()
     }
+
+@router.get("/time")
+async def get_server_time():
+    """Get current server time"""
+    global _cached_time
+    now = time.time()
+    second = int(now)
+    if second != _cached_time[0]:
+        _cached_time = (second, _build_server_time(datetime.fromtimestamp(now)))
+    return _cached_time[1]
@@ -1,18 +1,44 @@
 import asyncio
 import logging
-from typing import Dict, List
-from datetime import datetime, timedelta
+import math
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
 from sqlalchemy.future import select
 from . import models, database, crud
+from .notification_service import notification_service
 
 logger = logging.getLogger(__name__)
 
+SECONDS_PER_DAY = 24 * 3600
+
+def _minute_of_day(hhmm: str) -> Optional[int]:
+    """Parse "HH:MM" into minutes since midnight (None if malformed)"""
+    try:
+        hour, minute = hhmm.split(":")
+        return int(hour) * 60 + int(minute)
+    except (AttributeError, ValueError):
+        return None
+
+# Built once so SQLAlchemy's compiled cache is hit on every check
+_ENABLED_SCHEDULES = select(models.Schedule).where(models.Schedule.enabled == True)
+
 class ScheduleEngine:
     def __init__(self):
         self.schedules: List[models.Schedule] = []
+        # Indices rebuilt by load_schedules so a tick only looks at schedules that can fire
+        self._by_minute: Dict[int, List[models.Schedule]] = {}  # Map minute of day -> once/daily/weekly schedules
+        self._interval_schedules: List[models.Schedule] = []
+        self._weekdays: Dict[int, frozenset] = {}  # Map schedule_id -> days_of_week for weekly schedules
+        self._interval_seconds: Dict[int, Tuple[int, int]] = {}  # Map schedule_id -> (interval, total duration) in seconds
+        self._duration_seconds: Dict[int, int] = {}  # Map schedule_id -> auto-off duration in seconds
         self.mqtt_service = None
         self._running = False
         self._active_timers: Dict[int, asyncio.Task] = {}  # Map schedule_id -> Task
+        self._notifications: Set[asyncio.Task] = set()  # in-flight notifications, kept referenced until done
+        self._wakeup = asyncio.Event()  # Set to recompute the next deadline early (e.g. on reload)
+        self._last_checked: Optional[datetime] = None  # Start of the last minute that was checked
 
     async def start(self, mqtt_service):
         """Start the schedule engine"""
@@ -30,11 +56,46 @@ class ScheduleEngine:
     async def load_schedules(self):
         """Load all enabled schedules from database"""
         async with database.AsyncSessionLocal() as db:
-            result = await db.execute(
-                select(models.Schedule).filter(models.Schedule.enabled == True)
-            )
+            result = await db.execute(_ENABLED_SCHEDULES)
             self.schedules = result.scalars().all()
             logger.info(f"Loaded {len(self.schedules)} enabled schedules")
+        
+        self._build_index()
+
+    def _build_index(self):
+        """Group schedules by firing minute; interval schedules are checked every tick"""
+        by_minute: Dict[int, List[models.Schedule]] = {}
+        interval_schedules: List[models.Schedule] = []
+        weekdays: Dict[int, frozenset] = {}
+        interval_seconds: Dict[int, Tuple[int, int]] = {}
+        duration_seconds: Dict[int, int] = {}
+        today = datetime.now().strftime("%Y-%m-%d")
+        
+        for schedule in self.schedules:
+            duration_seconds[schedule.id] = self._convert_to_seconds(schedule.duration, schedule.duration_unit)
+            if schedule.schedule_type == "interval":
+                interval_schedules.append(schedule)
+                interval_seconds[schedule.id] = (
+                    self._convert_to_seconds(schedule.interval_value, schedule.interval_unit),
+                    self._convert_to_seconds(schedule.total_duration_value, schedule.total_duration_unit),
+                )
+                continue
+            if schedule.schedule_type == "once" and schedule.date and schedule.date < today:
+                # Already in the past, can never fire
+                continue
+            if schedule.schedule_type == "weekly":
+                weekdays[schedule.id] = frozenset(schedule.days_of_week or ())
+            minute = _minute_of_day(schedule.time)
+            if minute is None:
+                logger.warning(f"Schedule {schedule.id} has invalid time {schedule.time!r}, skipping")
+                continue
+            by_minute.setdefault(minute, []).append(schedule)
+        
+        self._by_minute = by_minute
+        self._interval_schedules = interval_schedules
+        self._weekdays = weekdays
+        self._interval_seconds = interval_seconds
+        self._duration_seconds = duration_seconds
 
     async def reload_schedules(self):
         """Reload schedules (call this when schedules are updated)"""
@@ -44,75 +105,127 @@ class ScheduleEngine:
         self._active_timers.clear()
         
         await self.load_schedules()
+        self._wakeup.set()
 
     async def _monitor_loop(self):
-        """Background loop to check schedules every minute"""
+        """Background loop that sleeps until the next minute a schedule can fire"""
         while self._running:
             try:
-                await self._check_schedules()
-                await asyncio.sleep(60)  # Check every minute
+                self._wakeup.clear()
+                
+                # Each minute is checked at most once, however often we wake up
+                minute = datetime.now().replace(second=0, microsecond=0)
+                if minute != self._last_checked:
+                    self._last_checked = minute
+                    await self._check_schedules()
+                
+                delay = self._seconds_until_next_check(datetime.now())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
             except Exception as e:
                 logger.error(f"Error in schedule monitor loop: {e}")
                 await asyncio.sleep(60)
 
+    def _seconds_until_next_check(self, now: datetime) -> Optional[float]:
+        """Seconds until the next minute start at which any schedule could fire (None if nothing is scheduled)"""
+        now_seconds = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1_000_000
+        current_minute = now.hour * 3600 + now.minute * 60  # already checked
+        candidates = []
+        
+        for minute in self._by_minute:
+            fire_at = minute * 60
+            candidates.append(fire_at if fire_at > current_minute else fire_at + SECONDS_PER_DAY)
+        
+        for schedule in self._interval_schedules:
+            interval_seconds = self._interval_seconds[schedule.id][0]
+            if interval_seconds <= 0:
+                continue
+            # Intervals are aligned to midnight and checked at the first minute start on/after each boundary
+            boundary = (current_minute // interval_seconds + 1) * interval_seconds
+            candidates.append(min(math.ceil(boundary / 60) * 60, SECONDS_PER_DAY))
+        
+        if not candidates:
+            return None
+        return max(min(candidates) - now_seconds, 0) + 0.01
+
     async def _check_schedules(self):
         """Check and execute matching schedules"""
         now = datetime.now()
-        current_time = now.strftime("%H:%M")
-        current_date = now.strftime("%Y-%m-%d")
+        minute_of_day = now.hour * 60 + now.minute
+        # Shared by every interval schedule checked this tick
+        now_utc = now.replace(tzinfo=timezone.utc)
+        seconds_since_midnight = minute_of_day * 60 + now.second
+        current_date = f"{now.year:04d}-{now.month:02d}-{now.day:02d}"
         current_weekday = now.weekday()  # 0 = Monday, 6 = Sunday
         
-        logger.info(f"Checking schedules at {now.strftime('%Y-%m-%d %H:%M:%S')} (weekday: {current_weekday})")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Checking schedules at {current_date} {now.hour:02d}:{now.minute:02d}:{now.second:02d} (weekday: {current_weekday})")
         
-        for schedule in self.schedules:
-            if not schedule.enabled:
-                continue
-            
-            try:
-                should_execute = False
-                
-                if schedule.schedule_type == "once":
-                    # One-time schedule: check date and time
-                    if schedule.date == current_date and schedule.time == current_time:
-                        should_execute = True
-                        # Disable after execution
-                        async with database.AsyncSessionLocal() as db:
-                            result = await db.execute(
-                                select(models.Schedule).filter(models.Schedule.id == schedule.id)
-                            )
-                            db_schedule = result.scalars().first()
-                            if db_schedule:
-                                db_schedule.enabled = False
-                                await db.commit()
-                
-                elif schedule.schedule_type == "daily":
-                    # Daily schedule: check time only
-                    if schedule.time == current_time:
-                        should_execute = True
+        # One session for the whole tick; schedule state changes are targeted UPDATEs committed together
+        async with database.AsyncSessionLocal() as db:
+            due: List[models.Schedule] = []
+            for schedule in self._by_minute.get(minute_of_day, []) + self._interval_schedules:
+                if not schedule.enabled:
+                    continue
                 
-                elif schedule.schedule_type == "weekly":
-                    # Weekly schedule: check day of week and time
-                    if current_weekday in schedule.days_of_week and schedule.time == current_time:
+                try:
+                    should_execute = False
+                    
+                    # Schedules in the minute bucket already match the current time
+                    if schedule.schedule_type == "once":
+                        # One-time schedule: check date
+                        if schedule.date == current_date:
+                            should_execute = True
+                            # Disable after execution
+                            await self._disable_schedule(db, schedule)
+                    
+                    elif schedule.schedule_type == "daily":
+                        # Daily schedule: time only
                         should_execute = True
-                
-                elif schedule.schedule_type == "interval":
-                    # Interval schedule: run every X time units for Y total duration
-                    should_execute = await self._check_interval_schedule(schedule, now)
-                
-                if should_execute:
-                    logger.info(f"Executing schedule: {schedule.name} (ID: {schedule.id})")
-                    await self._execute_schedule(schedule)
                     
+                    elif schedule.schedule_type == "weekly":
+                        # Weekly schedule: check day of week
+                        if current_weekday in self._weekdays.get(schedule.id, ()):
+                            should_execute = True
+                    
+                    elif schedule.schedule_type == "interval":
+                        # Interval schedule: run every X time units for Y total duration
+                        should_execute = await self._check_interval_schedule(db, schedule, now_utc, seconds_since_midnight)
+                    
+                    if should_execute:
+                        due.append(schedule)
+                        
+                except Exception as e:
+                    logger.error(f"Error checking schedule {schedule.id}: {e}")
+            
+            try:
+                await db.commit()
             except Exception as e:
-                logger.error(f"Error checking schedule {schedule.id}: {e}")
+                logger.error(f"Error saving schedule state: {e}")
+            
+            # All target devices in one query, however many schedules fire
+            devices = await crud.get_devices_by_ids(db, (schedule.device_id for schedule in due))
+        
+        # Schedules due on the same minute run concurrently
+        if due:
+            await asyncio.gather(
+                *(self._execute_schedule(schedule, devices.get(schedule.device_id)) for schedule in due),
+                return_exceptions=True
+            )
+
+    async def _disable_schedule(self, db, schedule: models.Schedule):
+        """Disable a schedule in the database and in memory (committed by the caller)"""
+        await db.execute(
+            update(models.Schedule).where(models.Schedule.id == schedule.id).values(enabled=False)
+        )
+        schedule.enabled = False
 
-    async def _check_interval_schedule(self, schedule: models.Schedule, now: datetime) -> bool:
+    async def _check_interval_schedule(self, db, schedule: models.Schedule, now_utc: datetime, seconds_since_midnight: int) -> bool:
         """Check if an interval schedule should execute now"""
-        from datetime import timezone
-        
-        # Convert interval to seconds
-        interval_seconds = self._convert_to_seconds(schedule.interval_value, schedule.interval_unit)
-        total_duration_seconds = self._convert_to_seconds(schedule.total_duration_value, schedule.total_duration_unit)
+        # Converted to seconds when the schedules were loaded
+        interval_seconds, total_duration_seconds = self._interval_seconds[schedule.id]
         
         if interval_seconds <= 0:
             return False
@@ -123,42 +236,25 @@ class ScheduleEngine:
         # Initialize start_time if not set
         if not schedule.start_time:
             # Set start time to now and save it
-            async with database.AsyncSessionLocal() as db:
-                result = await db.execute(
-                    select(models.Schedule).filter(models.Schedule.id == schedule.id)
-                )
-                db_schedule = result.scalars().first()
-                if db_schedule:
-                    db_schedule.start_time = now.replace(tzinfo=timezone.utc)
-                    await db.commit()
-                    schedule.start_time = db_schedule.start_time
+            start_time = now_utc
+            await db.execute(
+                update(models.Schedule).where(models.Schedule.id == schedule.id).values(start_time=start_time)
+            )
+            schedule.start_time = start_time
         
         # Check if total duration has been exceeded
         start_time = schedule.start_time
         if start_time.tzinfo is None:
             start_time = start_time.replace(tzinfo=timezone.utc)
         
-        now_utc = now.replace(tzinfo=timezone.utc)
         elapsed_seconds = (now_utc - start_time).total_seconds()
         
         if not is_indefinite and elapsed_seconds > total_duration_seconds:
             # Total duration exceeded, disable schedule
             logger.info(f"Interval schedule {schedule.name} total duration exceeded, disabling")
-            async with database.AsyncSessionLocal() as db:
-                result = await db.execute(
-                    select(models.Schedule).filter(models.Schedule.id == schedule.id)
-                )
-                db_schedule = result.scalars().first()
-                if db_schedule:
-                    db_schedule.enabled = False
-                    await db.commit()
+            await self._disable_schedule(db, schedule)
             return False
         
-        # Calculate next execution time aligned to midnight
-        # Get seconds since midnight
-        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        seconds_since_midnight = (now - midnight).total_seconds()
-        
         # Check if current time aligns with interval from midnight
         # We check if we're within the current minute of an interval boundary
         remainder = seconds_since_midnight % interval_seconds
@@ -180,42 +276,53 @@ class ScheduleEngine:
             return value * 3600
         return 0
 
-    async def _execute_schedule(self, schedule: models.Schedule):
+    async def _execute_schedule(self, schedule: models.Schedule, device: Optional[models.Device]):
         """Execute a schedule's action"""
+        logger.info(f"Executing schedule: {schedule.name} (ID: {schedule.id})")
         try:
-            async with database.AsyncSessionLocal() as db:
-                device = await crud.get_device(db, schedule.device_id)
-                if not device or not self.mqtt_service:
-                    logger.error(f"Device {schedule.device_id} not found or MQTT not available")
-                    return
-                
-                # Send command to turn on/off/toggle
-                topic = f"cmnd/{device.mqtt_topic}/{schedule.switch_name}"
-                await self.mqtt_service.publish(topic, schedule.action)
-                logger.info(f"Executed schedule {schedule.name}: {topic} -> {schedule.action}")
-                
-                # Send notification
-                from .notification_service import notification_service
-                await notification_service.notify("schedule", f"Schedule '{schedule.name}' executed: {schedule.action} on {device.name}")
+            if not device or not self.mqtt_service:
+                logger.error(f"Device {schedule.device_id} not found or MQTT not available")
+                return
+            
+            # Send command to turn on/off/toggle
+            topic = f"cmnd/{device.mqtt_topic}/{schedule.switch_name}"
+            await self.mqtt_service.publish(topic, schedule.action)
+            logger.info(f"Executed schedule {schedule.name}: {topic} -> {schedule.action}")
+            
+            # Send notification
+            self._notify_nowait(f"Schedule '{schedule.name}' executed: {schedule.action} on {device.name}")
+            
+            # If duration > 0, set a timer to turn off
+            if schedule.duration > 0 and schedule.action in ["ON", "TOGGLE"]:
+                # Cancel existing timer if any
+                if schedule.id in self._active_timers:
+                    self._active_timers[schedule.id].cancel()
                 
-                # If duration > 0, set a timer to turn off
-                if schedule.duration > 0 and schedule.action in ["ON", "TOGGLE"]:
-                    # Cancel existing timer if any
-                    if schedule.id in self._active_timers:
-                        self._active_timers[schedule.id].cancel()
-                    
-                    # Create new timer
-                    # Convert duration to seconds based on unit
+                # Create new timer
+                # Converted to seconds at load time (fall back if the schedule was reloaded away meanwhile)
+                duration_seconds = self._duration_seconds.get(schedule.id)
+                if duration_seconds is None:
                     duration_seconds = self._convert_to_seconds(schedule.duration, schedule.duration_unit)
-                    task = asyncio.create_task(
-                        self._delayed_turn_off(schedule, device, duration_seconds)
-                    )
-                    self._active_timers[schedule.id] = task
-                    task.add_done_callback(lambda t: self._active_timers.pop(schedule.id, None))
-                    
+                task = asyncio.create_task(
+                    self._delayed_turn_off(schedule, device, duration_seconds)
+                )
+                self._active_timers[schedule.id] = task
+                task.add_done_callback(partial(self._clear_timer, schedule.id))
+                
         except Exception as e:
             logger.error(f"Error executing schedule {schedule.id}: {e}")
 
+    def _notify_nowait(self, message: str):
+        """Send a schedule notification in the background so provider latency doesn't hold up schedules"""
+        task = asyncio.create_task(notification_service.notify("schedule", message))
+        self._notifications.add(task)
+        task.add_done_callback(self._notifications.discard)
+
+    def _clear_timer(self, schedule_id: int, task: asyncio.Task):
+        """Done callback: forget a finished timer unless it was already replaced"""
+        if self._active_timers.get(schedule_id) is task:
+            del self._active_timers[schedule_id]
+
     async def _delayed_turn_off(self, schedule: models.Schedule, device: models.Device, delay_seconds: int):
         """Wait for delay and then turn off the switch"""
         try:
@@ -225,14 +332,12 @@ class ScheduleEngine:
             logger.info(f"Schedule {schedule.name} duration expired, turned OFF")
             
             # Send notification for schedule turn-off
-            from .notification_service import notification_service
-            await notification_service.notify("schedule", f"Schedule '{schedule.name}' duration expired: Turned OFF {device.name}/{schedule.switch_name}")
+            self._notify_nowait(f"Schedule '{schedule.name}' duration expired: Turned OFF {device.name}/{schedule.switch_name}")
         except asyncio.CancelledError:
             logger.info(f"Schedule {schedule.name} timer cancelled")
             
             # Send notification that schedule was stopped manually
-            from .notification_service import notification_service
-            await notification_service.notify("schedule", f"Schedule '{schedule.name}' stopped manually: {device.name}/{schedule.switch_name}")
+            self._notify_nowait(f"Schedule '{schedule.name}' stopped manually: {device.name}/{schedule.switch_name}")
             raise
 
     async def stop(self):
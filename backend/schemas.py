@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, model_validator
+from typing import Annotated, Literal, Optional, List, Dict, Any, Union
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -11,8 +11,7 @@ class UserCreate(UserBase):
 class User(UserBase):
     id: int
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Token(BaseModel):
     access_token: str
@@ -27,7 +26,7 @@ class MQTTConfigBase(BaseModel):
     username: Optional[str] = None
     password: Optional[str] = None
     discovery_prefix: str = "tasmota/discovery"
-    custom_topics: Optional[List[str]] = []
+    custom_topics: Optional[List[str]] = Field(default_factory=list)
 
 class MQTTConfigCreate(MQTTConfigBase):
     pass
@@ -35,8 +34,7 @@ class MQTTConfigCreate(MQTTConfigBase):
 class MQTTConfig(MQTTConfigBase):
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class DeviceBase(BaseModel):
     mqtt_topic: str
@@ -45,16 +43,15 @@ class DeviceBase(BaseModel):
     ip_address: Optional[str] = None
     is_online: bool = False
     protected: bool = False
-    attributes: Dict[str, Any] = {}
-    dashboard_config: Dict[str, Any] = {}
-    switch_labels: Dict[str, str] = {}
-    active_timers: Dict[str, Optional[str]] = {}
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+    dashboard_config: Dict[str, Any] = Field(default_factory=dict)
+    switch_labels: Dict[str, str] = Field(default_factory=dict)
+    active_timers: Dict[str, str | None] = Field(default_factory=dict)
 
 class Device(DeviceBase):
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AutomationBase(BaseModel):
     name: str
@@ -64,14 +61,77 @@ class AutomationBase(BaseModel):
     action_type: str
     action_value: Dict[str, Any]
 
+# Typed trigger/action payloads. The stored JSON has no "type" key - the tag comes from the
+# automation's trigger_type/action_type column and is only added while validating.
+# Unknown keys are kept so the stored payload round-trips unchanged.
+
+class MQTTTrigger(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    type: Literal["mqtt"]
+    topic: str
+    payload_contains: Optional[str] = None
+    payload_json_path: Optional[str] = None
+    payload_json_value: Any = None
+
+class TimeTrigger(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    type: Literal["time"]
+    hour: int = Field(ge=0, le=23)
+    minute: int = Field(ge=0, le=59)
+
+class DeviceStateTrigger(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    type: Literal["device_state"]
+    device_id: int
+    attribute: str
+    value: Any = None
+    operator: Literal["==", "!=", "<", "<=", ">", ">="] = "=="
+    for_duration: Optional[float] = None  # minutes
+
+class MQTTPublishAction(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    type: Literal["mqtt_publish"]
+    topic: str
+    payload: Any = None
+
+class DeviceCommandAction(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    type: Literal["device_command"]
+    device_id: int
+    command: str
+    payload: Any = None
+
+class DelayAction(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    type: Literal["delay"]
+    seconds: float = 0
+
+Trigger = Annotated[Union[MQTTTrigger, TimeTrigger, DeviceStateTrigger], Field(discriminator="type")]
+Action = Annotated[Union[MQTTPublishAction, DeviceCommandAction, DelayAction], Field(discriminator="type")]
+
+_TRIGGER_ADAPTER = TypeAdapter(Trigger)
+_ACTION_ADAPTER = TypeAdapter(Action)
+
 class AutomationCreate(AutomationBase):
-    pass
+    @model_validator(mode="after")
+    def _validate_payloads(self):
+        """Check trigger_value/action_value against the model selected by trigger_type/action_type"""
+        trigger = _TRIGGER_ADAPTER.validate_python({**self.trigger_value, "type": self.trigger_type})
+        action = _ACTION_ADAPTER.validate_python({**self.action_value, "type": self.action_type})
+        self.trigger_value = trigger.model_dump(exclude={"type"}, exclude_unset=True)
+        self.action_value = action.model_dump(exclude={"type"}, exclude_unset=True)
+        return self
 
 class Automation(AutomationBase):
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AutomationLogBase(BaseModel):
     automation_id: int
@@ -84,5 +144,28 @@ class AutomationLog(AutomationLogBase):
     id: int
     timestamp: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class ScheduleResponse(BaseModel):
+    id: int
+    name: str
+    enabled: Optional[bool] = True
+    device_id: Optional[int] = None
+    switch_name: Optional[str] = None
+    schedule_type: str
+    time: Optional[str] = None
+    days_of_week: Optional[List[int]] = None
+    date: Optional[str] = None
+    duration: Optional[int] = None
+    duration_unit: Optional[str] = None
+    interval_value: Optional[int] = None
+    interval_unit: Optional[str] = None
+    total_duration_value: Optional[int] = None
+    total_duration_unit: Optional[str] = None
+    action: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class SensorReading(BaseModel):
+    timestamp: datetime
+    data: Dict[str, Any]
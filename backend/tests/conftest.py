@@ -0,0 +1,25 @@
+import pytest
+from unittest.mock import AsyncMock
+from backend.automation_engine import AutomationEngine
+
+@pytest.fixture(scope="module")
+def shared_engine():
+    """One AutomationEngine per test module; `engine` resets it around each test"""
+    return AutomationEngine()
+
+@pytest.fixture
+def engine(shared_engine):
+    """The module's engine with no automations and a fresh execute_automation mock"""
+    shared_engine.execute_automation = AsyncMock()
+    shared_engine.automations = []
+    yield shared_engine
+    
+    # Leave nothing running for the next test
+    for task in list(shared_engine._active_delays.values()):
+        task.cancel()
+    shared_engine._active_delays.clear()
+    for handle in shared_engine._time_handles.values():
+        handle.cancel()
+    shared_engine._time_handles.clear()
+    shared_engine._device_cache.clear()
+    shared_engine.automations = []
@@ -1,12 +1,12 @@
 import pytest
 import asyncio
 from unittest.mock import MagicMock, AsyncMock, patch
-from backend.automation_engine import AutomationEngine
-from backend import models
+from backend.automation_engine import AutomationEngine, _compile_topic_pattern
+from backend import models, schemas
+from pydantic import ValidationError
 
 @pytest.mark.asyncio
-async def test_compare_values():
-    engine = AutomationEngine()
+async def test_compare_values(engine):
     
     # Numeric comparisons
     assert engine._compare_values(10, 10, '==') is True
@@ -21,10 +21,16 @@ async def test_compare_values():
     assert engine._compare_values("ON", "OFF", '!=') is True
     assert engine._compare_values("ON", "OFF", '==') is False
 
-@pytest.mark.asyncio
-async def test_handle_device_state_change_trigger():
+def test_compile_topic_pattern():
     engine = AutomationEngine()
-    engine.execute_automation = AsyncMock()
+    
+    for pattern in ["tele/+/STATE", "tele/pump/STATE", "tasmota/#", "#"]:
+        compiled = _compile_topic_pattern(pattern)
+        for topic in ["tele/pump/STATE", "tele/pump/SENSOR", "tasmota/pump/tele/STATE", "tasmota"]:
+            assert (compiled.fullmatch(topic) is not None) == engine._topic_matches(topic, pattern)
+
+@pytest.mark.asyncio
+async def test_handle_device_state_change_trigger(engine):
     
     # Mock automation
     automation = MagicMock(spec=models.Automation)
@@ -53,9 +59,7 @@ async def test_handle_device_state_change_trigger():
     assert args[0][1]["trigger"] == "device_state"
 
 @pytest.mark.asyncio
-async def test_handle_device_state_change_no_trigger():
-    engine = AutomationEngine()
-    engine.execute_automation = AsyncMock()
+async def test_handle_device_state_change_no_trigger(engine):
     
     # Mock automation
     automation = MagicMock(spec=models.Automation)
@@ -80,9 +84,7 @@ async def test_handle_device_state_change_no_trigger():
     engine.execute_automation.assert_not_called()
 
 @pytest.mark.asyncio
-async def test_handle_device_state_change_wrong_device():
-    engine = AutomationEngine()
-    engine.execute_automation = AsyncMock()
+async def test_handle_device_state_change_wrong_device(engine):
     
     # Mock automation
     automation = MagicMock(spec=models.Automation)
@@ -107,9 +109,7 @@ async def test_handle_device_state_change_wrong_device():
     engine.execute_automation.assert_not_called()
 
 @pytest.mark.asyncio
-async def test_handle_device_state_change_disabled():
-    engine = AutomationEngine()
-    engine.execute_automation = AsyncMock()
+async def test_handle_device_state_change_disabled(engine):
     
     # Mock automation
     automation = MagicMock(spec=models.Automation)
@@ -132,3 +132,215 @@ async def test_handle_device_state_change_disabled():
     await engine.handle_device_state_change(1, old_state, new_state)
     
     engine.execute_automation.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_handle_mqtt_message_trigger(engine):
+    
+    # Mock automations: one MQTT trigger, one device trigger that must not fire
+    mqtt_automation = MagicMock(spec=models.Automation)
+    mqtt_automation.id = 1
+    mqtt_automation.enabled = True
+    mqtt_automation.trigger_type = "mqtt"
+    mqtt_automation.trigger_value = {
+        "topic": "tele/+/STATE",
+        "payload_contains": "ON"
+    }
+    
+    device_automation = MagicMock(spec=models.Automation)
+    device_automation.id = 2
+    device_automation.enabled = True
+    device_automation.trigger_type = "device_state"
+    device_automation.trigger_value = {
+        "device_id": 1,
+        "attribute": "POWER",
+        "value": "ON",
+        "operator": "=="
+    }
+    
+    engine.automations = [mqtt_automation, device_automation]
+    
+    await engine.handle_mqtt_message("tele/pump/STATE", '{"POWER": "ON"}')
+    
+    engine.execute_automation.assert_called_once()
+    args = engine.execute_automation.call_args
+    assert args[0][0] == mqtt_automation
+    assert args[0][1]["trigger"] == "mqtt"
+    
+    # Non-matching topic
+    engine.execute_automation.reset_mock()
+    await engine.handle_mqtt_message("stat/pump/RESULT", '{"POWER": "ON"}')
+    engine.execute_automation.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_apply_delta(engine):
+    
+    automation = MagicMock(spec=models.Automation)
+    automation.id = 1
+    automation.enabled = True
+    automation.trigger_type = "mqtt"
+    automation.trigger_value = {"topic": "tele/pump/STATE"}
+    
+    # Added without a reload
+    engine.apply_delta(1, "upsert", automation)
+    await engine.handle_mqtt_message("tele/pump/STATE", "{}")
+    engine.execute_automation.assert_called_once()
+    
+    # Edited topic replaces the old index entry
+    engine.execute_automation.reset_mock()
+    automation.trigger_value = {"topic": "tele/+/SENSOR"}
+    engine.apply_delta(1, "upsert", automation)
+    await engine.handle_mqtt_message("tele/pump/STATE", "{}")
+    engine.execute_automation.assert_not_called()
+    await engine.handle_mqtt_message("tele/pump/SENSOR", "{}")
+    engine.execute_automation.assert_called_once()
+    
+    # Toggled off, then deleted
+    engine.execute_automation.reset_mock()
+    automation.enabled = False
+    engine.apply_delta(1, "toggle", automation)
+    await engine.handle_mqtt_message("tele/pump/SENSOR", "{}")
+    engine.execute_automation.assert_not_called()
+    
+    engine.apply_delta(1, "delete")
+    assert engine.automations == []
+    assert engine._mqtt_exact == {} and engine._mqtt_wild == []
+
+@pytest.mark.asyncio
+async def test_device_state_index_by_attribute(engine):
+    
+    automation = MagicMock(spec=models.Automation)
+    automation.id = 1
+    automation.enabled = True
+    automation.trigger_type = "device_state"
+    automation.trigger_value = {"device_id": 1, "attribute": "POWER", "value": "ON", "operator": "=="}
+    engine.apply_delta(1, "upsert", automation)
+    
+    # Changes to other attributes don't reach the trigger
+    await engine.handle_device_state_change(1, {"POWER": "OFF", "Temp": 20}, {"POWER": "OFF", "Temp": 21})
+    engine.execute_automation.assert_not_called()
+    
+    await engine.handle_device_state_change(1, {"POWER": "OFF"}, {"POWER": "ON"})
+    engine.execute_automation.assert_called_once()
+    
+    engine.apply_delta(1, "delete")
+    assert engine._by_attribute == {} and engine._watched_attributes == {}
+
+@pytest.mark.asyncio
+async def test_handle_mqtt_message_json_path(engine):
+    
+    automation = MagicMock(spec=models.Automation)
+    automation.id = 1
+    automation.enabled = True
+    automation.trigger_type = "mqtt"
+    automation.trigger_value = {
+        "topic": "stat/pump/RESULT",
+        "payload_json_path": "POWER",
+        "payload_json_value": "ON"
+    }
+    
+    engine.automations = [automation]
+    
+    # Value not present in the raw payload
+    await engine.handle_mqtt_message("stat/pump/RESULT", '{"POWER": "OFF"}')
+    engine.execute_automation.assert_not_called()
+    
+    # Value present under another key
+    await engine.handle_mqtt_message("stat/pump/RESULT", '{"POWER": "OFF", "Mode": "ON"}')
+    engine.execute_automation.assert_not_called()
+    
+    await engine.handle_mqtt_message("stat/pump/RESULT", '{"POWER": "ON"}')
+    engine.execute_automation.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_log_execution_batched():
+    engine = AutomationEngine()
+    engine._write_logs = AsyncMock()
+    engine._running = True
+    
+    for automation_id in (1, 2, 3):
+        await engine._log_execution(automation_id, {"trigger": "test"}, {}, True, None)
+    
+    flusher = asyncio.create_task(engine._log_flusher())
+    await asyncio.sleep(0.05)
+    engine._running = False
+    await flusher
+    
+    # All queued entries are written in one batch
+    engine._write_logs.assert_called_once()
+    batch = engine._write_logs.call_args[0][0]
+    assert [entry["automation_id"] for entry in batch] == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_stop_flushes_log_queue():
+    engine = AutomationEngine()
+    engine._write_logs = AsyncMock()
+    engine._running = True
+    engine._log_writer = asyncio.create_task(engine._log_flusher())
+    await asyncio.sleep(0)
+
+    # Queued after the flusher last looked; stop() must still write it and end the writer
+    await engine._log_execution(1, {"trigger": "test"}, {}, True, None)
+    await engine.stop()
+
+    written = [entry["automation_id"] for call in engine._write_logs.call_args_list for entry in call[0][0]]
+    assert written == [1]
+    assert engine._log_writer is None
+    assert engine._log_queue.empty()
+
+@pytest.mark.asyncio
+async def test_time_trigger_scheduled(engine):
+    engine._running = True
+    
+    automation = MagicMock(spec=models.Automation)
+    automation.id = 1
+    automation.enabled = True
+    automation.trigger_type = "time"
+    automation.trigger_value = {"hour": 6, "minute": 30}
+    
+    engine.automations = [automation]
+    engine._schedule_time_triggers()
+    
+    # One pending timer, due within the next day
+    handle = engine._time_handles[automation.id]
+    delay = handle.when() - asyncio.get_running_loop().time()
+    assert 0 <= delay <= 24 * 3600
+    
+    # Firing executes the automation and schedules the next occurrence
+    engine._fire_time_trigger(engine._by_time[0])
+    await asyncio.sleep(0)
+    engine.execute_automation.assert_called_once()
+    assert engine._time_handles[automation.id] is not handle
+    
+    await engine.stop()
+    assert not engine._time_handles
+
+def test_automation_create_validates_payloads():
+    automation = schemas.AutomationCreate(
+        name="Morning",
+        trigger_type="time",
+        trigger_value={"hour": "6", "minute": 30},
+        action_type="mqtt_publish",
+        action_value={"topic": "cmnd/pump/POWER", "payload": "ON", "retain": False}
+    )
+    
+    # Values are coerced, unknown keys kept, and no "type" tag is stored
+    assert automation.trigger_value == {"hour": 6, "minute": 30}
+    assert automation.action_value == {"topic": "cmnd/pump/POWER", "payload": "ON", "retain": False}
+    
+    with pytest.raises(ValidationError):
+        schemas.AutomationCreate(
+            name="Broken",
+            trigger_type="device_state",
+            trigger_value={"device_id": 1, "attribute": "POWER", "operator": "~"},
+            action_type="delay",
+            action_value={}
+        )
+    
+    with pytest.raises(ValidationError):
+        schemas.AutomationCreate(
+            name="Unknown",
+            trigger_type="sunset",
+            trigger_value={},
+            action_type="delay",
+            action_value={}
+        )
@@ -5,9 +5,7 @@ from backend.automation_engine import AutomationEngine
 from backend import models
 
 @pytest.mark.asyncio
-async def test_automation_duration_success():
-    engine = AutomationEngine()
-    engine.execute_automation = AsyncMock()
+async def test_automation_duration_success(engine):
     
     # Mock automation with duration
     automation = MagicMock(spec=models.Automation)
@@ -26,6 +24,8 @@ async def test_automation_duration_success():
     # If we set for_duration to 0.001, it sleeps 0.06s. That's fine.
     
     engine.automations = [automation]
+    done = asyncio.Event()
+    engine.execute_automation = AsyncMock(side_effect=lambda *a, **kw: done.set())
     
     # 1. State changes to Idle -> Timer should start
     old_state = {"STATUS": "Active"}
@@ -33,19 +33,19 @@ async def test_automation_duration_success():
     
     await engine.handle_device_state_change(1, old_state, new_state)
     
-    assert automation.id in engine._active_delays
+    task = engine._active_delays[automation.id]
     
     # 2. Wait for timer to expire
-    await asyncio.sleep(0.1)
+    await asyncio.wait_for(done.wait(), 1.0)
+    await asyncio.wait_for(task, 1.0)
+    await asyncio.sleep(0) # let the done callback run
     
     # 3. Verify execution
     engine.execute_automation.assert_called_once()
     assert automation.id not in engine._active_delays
 
 @pytest.mark.asyncio
-async def test_automation_duration_cancellation():
-    engine = AutomationEngine()
-    engine.execute_automation = AsyncMock()
+async def test_automation_duration_cancellation(engine):
     
     # Mock automation with duration
     automation = MagicMock(spec=models.Automation)
@@ -61,28 +61,30 @@ async def test_automation_duration_cancellation():
     }
     
     engine.automations = [automation]
+    done = asyncio.Event()
+    engine.execute_automation = AsyncMock(side_effect=lambda *a, **kw: done.set())
     
     # 1. State changes to Idle -> Timer starts
     await engine.handle_device_state_change(1, {"STATUS": "Active"}, {"STATUS": "Idle"})
-    assert automation.id in engine._active_delays
+    task = engine._active_delays[automation.id]
     
     # 2. State changes to Active BEFORE timer expires -> Timer should cancel
-    await asyncio.sleep(0.1) # Wait a bit but less than 0.3s
+    await asyncio.sleep(0) # let the delay task start sleeping
     await engine.handle_device_state_change(1, {"STATUS": "Idle"}, {"STATUS": "Active"})
     
     # 3. Verify cancellation
     # The task should be removed from _active_delays immediately
     assert automation.id not in engine._active_delays
     
-    # 4. Wait longer to ensure it doesn't fire
-    await asyncio.sleep(0.3)
+    # 4. The delay task finishes as cancelled without firing
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(task, 1.0)
+    assert not done.is_set()
     engine.execute_automation.assert_not_called()
 
 @pytest.mark.asyncio
-async def test_automation_duration_heartbeat():
+async def test_automation_duration_heartbeat(engine):
     """Test that repeated matching updates don't reset the timer"""
-    engine = AutomationEngine()
-    engine.execute_automation = AsyncMock()
     
     # Mock automation with duration
     automation = MagicMock(spec=models.Automation)
@@ -98,6 +100,8 @@ async def test_automation_duration_heartbeat():
     }
     
     engine.automations = [automation]
+    done = asyncio.Event()
+    engine.execute_automation = AsyncMock(side_effect=lambda *a, **kw: done.set())
     
     # 1. State changes to Idle -> Timer starts
     await engine.handle_device_state_change(1, {"STATUS": "Active"}, {"STATUS": "Idle"})
@@ -105,12 +109,12 @@ async def test_automation_duration_heartbeat():
     assert original_task is not None
     
     # 2. State update (heartbeat) still Idle -> Timer should continue (not reset)
-    await asyncio.sleep(0.1)
+    await asyncio.sleep(0)
     await engine.handle_device_state_change(1, {"STATUS": "Idle"}, {"STATUS": "Idle"})
     
     current_task = engine._active_delays.get(automation.id)
     assert current_task is original_task # Should be the same task object
     
     # 3. Wait for completion
-    await asyncio.sleep(0.3)
+    await asyncio.wait_for(done.wait(), 1.0)
     engine.execute_automation.assert_called_once()
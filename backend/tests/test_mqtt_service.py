@@ -0,0 +1,26 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock
+from backend.mqtt_service import MQTTService
+
+def _written_device_ids(write_mock):
+    return sorted(row["device_id"] for call in write_mock.call_args_list for row in call[0][0])
+
+@pytest.mark.asyncio
+async def test_stop_flushes_sensor_history():
+    service = MQTTService()
+    service._write_sensor_rows = AsyncMock()
+    service._sensor_writer = asyncio.create_task(service._sensor_writer_loop())
+
+    # The writer takes the first reading and waits for more to fill its batch
+    service.enqueue_sensor_data(1, {"Temperature": 20})
+    await asyncio.sleep(0)
+    service.enqueue_sensor_data(2, {"Temperature": 21})
+    service.enqueue_sensor_data(3, {"Temperature": 22})
+
+    await service.stop()
+
+    # Nothing is lost: the batch being collected and the rest of the queue are both written
+    assert _written_device_ids(service._write_sensor_rows) == [1, 2, 3]
+    assert service._sensor_writer is None
+    assert service._sensor_queue.empty()
@@ -1,92 +1,147 @@
 import asyncio
+import functools
+import heapq
 import logging
 from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 from .database import AsyncSessionLocal
-from .crud import get_devices, create_or_update_device
+from .crud import get_devices_by_ids, get_devices_with_active_timers, update_devices_batch
 from .mqtt_service import mqtt_service
+from .notification_service import notification_service
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=4096)
+def _parse_end_time(end_time_str: str) -> datetime:
+    """Parse a stored timer end time (cached per string); naive values are taken as UTC"""
+    # fromisoformat accepts a trailing Z since Python 3.11
+    end_time = datetime.fromisoformat(end_time_str)
+    # Ensure end_time is timezone aware (assume UTC if not)
+    if end_time.tzinfo is None:
+        end_time = end_time.replace(tzinfo=timezone.utc)
+    return end_time
+
 class TimerService:
+    __slots__ = ("running", "_heap", "_wake")
+
     def __init__(self):
         self.running = False
-        
+        # Min-heap of (end_time, device_id, switch). Entries are not removed when a timer is
+        # cancelled or replaced; they are checked against the device when they come due.
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._wake = asyncio.Event()
+
     async def start(self):
         """Start the timer service background task"""
         self.running = True
         logger.info("Timer Service starting...")
         asyncio.create_task(self._check_timers_loop())
-        
+
     async def stop(self):
         """Stop the timer service"""
         self.running = False
+        self._wake.set()
         logger.info("Timer Service stopped")
-        
+
+    def schedule(self, device_id: int, switch: str, end_time: datetime):
+        """Register a timer so the loop wakes up when it expires"""
+        heapq.heappush(self._heap, (end_time, device_id, switch))
+        self._wake.set()
+
     async def _check_timers_loop(self):
-        """Background task that checks for expired timers every 10 seconds"""
+        """Background task that sleeps until the earliest timer expires"""
+        try:
+            await self._load_timers()
+        except Exception as e:
+            logger.error(f"Error loading timers: {e}")
+
         while self.running:
+            self._wake.clear()
             try:
                 await self._check_and_execute_timers()
             except Exception as e:
                 logger.error(f"Error in timer check loop: {e}")
-            await asyncio.sleep(10)  # Check every 10 seconds
-            
+
+            timeout: Optional[float] = None
+            if self._heap:
+                timeout = max((self._heap[0][0] - datetime.now(timezone.utc)).total_seconds(), 0)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _load_timers(self):
+        """Seed the heap from the timers stored on devices (once, at startup)"""
+        async with AsyncSessionLocal() as db:
+            devices = await get_devices_with_active_timers(db)
+
+        for device in devices:
+            for switch, end_time_str in (device.active_timers or {}).items():
+                if not end_time_str:
+                    continue
+                try:
+                    heapq.heappush(self._heap, (_parse_end_time(end_time_str), device.id, switch))
+                except Exception as e:
+                    logger.error(f"Error parsing timer for {device.mqtt_topic}/{switch}: {e}")
+        logger.info(f"Loaded {len(self._heap)} active timers")
+
     async def _check_and_execute_timers(self):
-        """Check all devices for expired timers and turn off switches"""
+        """Turn off switches whose timers have expired"""
+        now = datetime.now(timezone.utc)
+        due: Dict[int, List[str]] = {}  # device_id -> switches
+        while self._heap and self._heap[0][0] <= now:
+            _, device_id, switch = heapq.heappop(self._heap)
+            due.setdefault(device_id, []).append(switch)
+        if not due:
+            return
+
+        expired: List[Tuple[str, str]] = []  # (mqtt_topic, switch)
+        device_updates: List[dict] = []
         async with AsyncSessionLocal() as db:
-            devices = await get_devices(db, skip=0, limit=1000)
-            now = datetime.now(timezone.utc)
-            
-            for device in devices:
-                if not device.active_timers:
+            devices = await get_devices_by_ids(db, due)
+
+            for device_id, switches in due.items():
+                device = devices.get(device_id)
+                if not device or not device.active_timers:
                     continue
-                    
-                updated_timers = {}
-                timers_to_execute = []
-                
-                for switch, end_time_str in device.active_timers.items():
+
+                updated_timers = dict(device.active_timers)
+                for switch in switches:
+                    end_time_str = updated_timers.get(switch)
                     if not end_time_str:
+                        # Cancelled since it was scheduled
                         continue
-                        
+
                     try:
-                        # Handle Z for UTC
-                        if end_time_str.endswith('Z'):
-                            end_time_str = end_time_str.replace('Z', '+00:00')
-                        
-                        end_time = datetime.fromisoformat(end_time_str)
-                        
-                        # Ensure end_time is timezone aware (assume UTC if not)
-                        if end_time.tzinfo is None:
-                            end_time = end_time.replace(tzinfo=timezone.utc)
-                        
-                        if now >= end_time:
+                        if now >= _parse_end_time(end_time_str):
                             # Timer expired - turn off switch
-                            timers_to_execute.append((device.mqtt_topic, switch))
+                            del updated_timers[switch]
+                            expired.append((device.mqtt_topic, switch))
                             logger.info(f"Timer expired for {device.mqtt_topic}/{switch}")
-                        else:
-                            # Timer still active
-                            updated_timers[switch] = end_time_str
+                        # Otherwise the timer was re-set and has its own heap entry
                     except Exception as e:
                         logger.error(f"Error parsing timer for {device.mqtt_topic}/{switch}: {e}")
-                
-                # Execute expired timers
-                for topic, switch in timers_to_execute:
-                    try:
-                        full_topic = f"cmnd/{topic}/{switch}"
-                        await mqtt_service.publish(full_topic, "OFF")
-                        logger.info(f"Turned off {full_topic}")
-                        
-                        # Send notification
-                        from .notification_service import notification_service
-                        await notification_service.notify("timer", f"Timer expired for {topic}/{switch}. Turned OFF.")
-                    except Exception as e:
-                        logger.error(f"Failed to turn off {topic}/{switch}: {e}")
-                
-                # Update device if timers changed
+
                 if len(updated_timers) != len(device.active_timers):
-                    await create_or_update_device(db, {
-                        "mqtt_topic": device.mqtt_topic,
-                        "active_timers": updated_timers
-                    })
+                    device_updates.append({"id": device.id, "active_timers": updated_timers})
+
+            # All changed devices in one executemany + commit
+            await update_devices_batch(db, device_updates)
+
+        # Turn everything off concurrently
+        results = await asyncio.gather(
+            *(self._turn_off(topic, switch) for topic, switch in expired),
+            return_exceptions=True
+        )
+        for (topic, switch), result in zip(expired, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to turn off {topic}/{switch}: {result}")
+
+    async def _turn_off(self, topic: str, switch: str):
+        """Publish OFF for an expired timer and send its notification"""
+        full_topic = f"cmnd/{topic}/{switch}"
+        await mqtt_service.publish(full_topic, "OFF")
+        logger.info(f"Turned off {full_topic}")
+        await notification_service.notify("timer", f"Timer expired for {topic}/{switch}. Turned OFF.")
 
 timer_service = TimerService()
@@ -1,30 +1,85 @@
 from fastapi import WebSocket
-from typing import List
+from typing import Optional, Set, Tuple, Union
+import asyncio
 import logging
+from . import json_codec
 
 logger = logging.getLogger(__name__)
 
+# A client that can't take a frame within this long is skipped for that message
+SEND_TIMEOUT = 2.0  # seconds
+
+# Window in which repeated schedule_broadcast() calls collapse into one send
+COALESCE_WINDOW = 0.05  # seconds
+
 class ConnectionManager:
+    __slots__ = ("active_connections", "_coalesced", "_flush_handle", "_flush_tasks")
+
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        # Copy-on-write: connect/disconnect rebind a new tuple, so broadcast can
+        # iterate the current one without copying it
+        self.active_connections: Tuple[WebSocket, ...] = ()
+        self._coalesced: Optional[str] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections = self.active_connections + (websocket,)
         logger.info(f"WebSocket connected. Total: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            logger.info(f"WebSocket disconnected. Total: {len(self.active_connections)}")
-
-    async def broadcast(self, message: dict):
-        # Filter dead connections if necessary, but for now just try/except
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.warning(f"Failed to send to websocket: {e}")
-                # We might want to remove it here, but disconnect usually handles it
+        if websocket not in self.active_connections:
+            return  # already dropped (e.g. after a failed broadcast)
+        self.active_connections = tuple(c for c in self.active_connections if c is not websocket)
+        logger.info(f"WebSocket disconnected. Total: {len(self.active_connections)}")
+
+    def has_clients(self) -> bool:
+        """Whether any WebSocket client is connected"""
+        return bool(self.active_connections)
+
+    async def broadcast(self, message: Union[dict, str]):
+        """Send a message (dict, or an already serialized JSON string) to every client concurrently"""
+        connections = self.active_connections
+        if not connections:
+            return
+        # Serialize once for all clients; text frames so the frontend can JSON.parse them
+        payload = message if isinstance(message, str) else json_codec.dumps(message)
+        results = await asyncio.gather(
+            *(asyncio.wait_for(connection.send_text(payload), SEND_TIMEOUT) for connection in connections),
+            return_exceptions=True
+        )
+        timed_out = 0
+        for connection, result in zip(connections, results):
+            if result is None:
+                continue
+            if isinstance(result, asyncio.TimeoutError):
+                # Slow but possibly alive; it only misses this message
+                timed_out += 1
+            elif isinstance(result, BaseException):
+                # Closed or broken socket - stop broadcasting to it
+                # %-style so nothing is formatted when warnings are filtered out
+                logger.warning("Dropping websocket after failed send: %r", result)
+                self.disconnect(connection)
+        if timed_out:
+            logger.warning("Timed out sending to %d websocket(s)", timed_out)
+
+    def schedule_broadcast(self, message: Union[dict, str]):
+        """Queue a broadcast; calls within COALESCE_WINDOW are collapsed and only the latest message is sent"""
+        if not self.active_connections:
+            return
+        self._coalesced = message if isinstance(message, str) else json_codec.dumps(message)
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(COALESCE_WINDOW, self._flush_coalesced)
+
+    def _flush_coalesced(self):
+        """Timer callback: send the latest coalesced message"""
+        self._flush_handle = None
+        payload, self._coalesced = self._coalesced, None
+        if payload is None:
+            return
+        task = asyncio.create_task(self.broadcast(payload))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
 
 manager = ConnectionManager()